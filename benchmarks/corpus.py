@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+# Tested with Python 3.8 or above
+
+import os
+from os import path
+import random
+import struct
+import zipfile
+from datetime import datetime, timedelta
+
+# Every generated file gets a date between these two, they are also used
+# as the files' mtime so the ExifTool stand-in reports stable dates
+START_DATE = datetime(2015, 1, 1)
+DATE_RANGE_SECONDS = 6 * 365 * 24 * 3600
+MODELS = ("NIKON Z 6", "NIKON Z 6_2", "iPhone 12", "Pixel 3")
+# Marker the ExifTool stand-in looks for in files without EXIF
+DATE_MARKER = b"PHOTOORG-DATE:"
+
+def random_bytes(rng, size):
+    # Random.randbytes only exists from Python 3.9
+    return rng.getrandbits(size * 8).to_bytes(size, "little") if size > 0 else b""
+
+def exif_tiff(model, date_time):
+    """Build a little-endian TIFF structure holding IFD0 with the Model and
+    a pointer to an EXIF IFD with DateTimeOriginal, which is all exifread
+    needs to find
+    """
+    model_data = model.encode() + b"\0"
+    date_data = date_time.encode() + b"\0"
+    ifd0_offset = 8
+    model_offset = ifd0_offset + 2 + 2 * 12 + 4
+    exif_offset = model_offset + len(model_data)
+    date_offset = exif_offset + 2 + 12 + 4
+    tiff = b"II*\0" + struct.pack("<I", ifd0_offset)
+    tiff += struct.pack("<H", 2)
+    tiff += struct.pack("<HHII", 0x0110, 2, len(model_data), model_offset)
+    tiff += struct.pack("<HHII", 0x8769, 4, 1, exif_offset)
+    tiff += struct.pack("<I", 0)
+    tiff += model_data
+    tiff += struct.pack("<H", 1)
+    tiff += struct.pack("<HHII", 0x9003, 2, len(date_data), date_offset)
+    tiff += struct.pack("<I", 0)
+    tiff += date_data
+    return tiff
+
+def jpeg_bytes(rng, size, model=None, date_time=None):
+    """A JPEG shaped file, with an EXIF APP1 segment when model is given.
+    The image data is random bytes, nothing here decodes it.
+    """
+    data = b"\xff\xd8"
+    if model is not None:
+        app1 = b"Exif\0\0" + exif_tiff(model, date_time)
+        data += b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1
+    else:
+        app0 = b"JFIF\0\x01\x01\0\0\x01\0\x01\0\0"
+        data += b"\xff\xe0" + struct.pack(">H", len(app0) + 2) + app0
+        if date_time is not None:
+            comment = DATE_MARKER + date_time.encode()
+            data += b"\xff\xfe" + struct.pack(">H", len(comment) + 2) + comment
+    data += b"\xff\xda" + random_bytes(rng, max(size - len(data) - 4, 0)) + b"\xff\xd9"
+    return data
+
+def nef_bytes(rng, size, model, date_time):
+    """A NEF-like TIFF container: the EXIF header followed by raw data"""
+    tiff = exif_tiff(model, date_time)
+    return tiff + random_bytes(rng, max(size - len(tiff), 0))
+
+def movie_bytes(rng, size, date_time):
+    """An ISO-BMFF stub (ftyp + mdat) that exifread does not recognise, the
+    date is only visible to the ExifTool stand-in
+    """
+    ftyp = b"ftypqt  \0\0\0\0qt  "
+    mdat = DATE_MARKER + date_time.encode() + random_bytes(rng, max(size - 64, 0))
+    return (struct.pack(">I", len(ftyp) + 4) + ftyp + struct.pack(">I", len(mdat) + 8) + b"mdat" + mdat)
+
+def generate(root, num_files=1000, avg_size_kb=128, seed=42):
+    """Generate a deterministic corpus under root and return a summary of
+    what was written. The mix is roughly 40% JPEG with EXIF, 10% JPEG
+    without EXIF, 20% NEF, 15% MOV/MP4, 5% burst shots with the date in
+    their name, plus 5% exact duplicates and 5% name collisions (same
+    name and date, different content).
+    """
+    rng = random.Random(seed)
+    files = []
+    os.makedirs(root, exist_ok=True)
+
+    def write(relpath, data, when):
+        filename = path.join(root, relpath)
+        os.makedirs(path.dirname(filename), exist_ok=True)
+        with open(filename, "wb") as f:
+            f.write(data)
+        mtime = when.timestamp()
+        os.utime(filename, (mtime, mtime))
+        files.append(filename)
+        return filename
+
+    originals = []
+    for i in range(num_files):
+        when = START_DATE + timedelta(seconds=rng.randrange(DATE_RANGE_SECONDS))
+        date_time = when.strftime("%Y:%m:%d %H:%M:%S")
+        size = int(rng.uniform(0.5, 1.5) * avg_size_kb * 1024)
+        model = rng.choice(MODELS)
+        folder = "card{:02d}/DCIM/{:03d}".format(i % 4, (i // 50) % 20)
+        kind = rng.random()
+        if kind < 0.40:
+            relpath = f"{folder}/DSC_{i:05d}.JPG"
+            data = jpeg_bytes(rng, size, model, date_time)
+        elif kind < 0.50:
+            relpath = f"{folder}/IMG_{i:05d}.jpg"
+            data = jpeg_bytes(rng, size, None, date_time)
+        elif kind < 0.70:
+            relpath = f"{folder}/DSC_{i:05d}.NEF"
+            data = nef_bytes(rng, size * 4, model, date_time)
+        elif kind < 0.85:
+            relpath = f"{folder}/VID_{i:05d}." + rng.choice(("MOV", "mp4"))
+            data = movie_bytes(rng, size * 8, date_time)
+        elif kind < 0.90:
+            relpath = "{}/burst{}_cover.jpg".format(folder, when.strftime("%Y%m%d%H%M%S"))
+            data = jpeg_bytes(rng, size, model, date_time)
+        elif kind < 0.95 and originals:
+            # Exact duplicate of an earlier file, in another folder
+            original, data, when = rng.choice(originals)
+            relpath = "dups/{}/{}".format(i, path.basename(original))
+        elif originals:
+            # Same name and date as an earlier file, different content
+            original, data, when = rng.choice(originals)
+            data = data[:len(data) // 2] + random_bytes(rng, len(data) - len(data) // 2)
+            relpath = "collisions/{}/{}".format(i, path.basename(original))
+        else:
+            continue
+        filename = write(relpath, data, when)
+        if kind < 0.90 and len(data) < 4 * 1024 * 1024:
+            originals.append((filename, data, when))
+    # Some of the noise a real card dump carries
+    write("card00/.DS_Store", random_bytes(rng, 1024), START_DATE)
+    write("card00/DCIM/000/Thumbs.db", random_bytes(rng, 4096), START_DATE)
+    return {"root": root, "files": len(files), "bytes": sum(path.getsize(f) for f in files), "seed": seed}
+
+def make_archives(corpus_root, zip_dir, num_archives=4):
+    """Pack the corpus into num_archives zip files, the way a Takeout
+    export comes split
+    """
+    os.makedirs(zip_dir, exist_ok=True)
+    filenames = sorted(path.join(dirpath, name) for dirpath, dirnames, names in os.walk(corpus_root) for name in names)
+    archives = [zipfile.ZipFile(path.join(zip_dir, f"takeout-{n:03d}.zip"), "w", zipfile.ZIP_DEFLATED)
+                for n in range(num_archives)]
+    for i, filename in enumerate(filenames):
+        archives[i % num_archives].write(filename, path.relpath(filename, corpus_root))
+    for archive in archives:
+        archive.close()
+    return len(filenames)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+# Tested with Python 3.8 or above
+
+"""Stand-in for ExifTool used by the benchmarks.
+
+It speaks just enough of `exiftool -stay_open True -@ -` for
+exiftool_client: arguments arrive one per line, -executeNUM runs them and
+answers {readyNUM}, -echo4 is echoed to stderr. -json requests return
+FileModifyDate from the file's mtime plus the date embedded by
+corpus.py; write requests (-model=...) change nothing and only print the
+summary ExifTool would.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+
+DATE_MARKER = b"PHOTOORG-DATE:"
+# How much of a file is looked at for the embedded date
+SCAN_BYTES = 64 * 1024
+
+def read_tags(filename):
+    st = os.stat(filename)
+    tags = {"SourceFile": filename,
+            "FileModifyDate": time.strftime("%Y:%m:%d %H:%M:%S", time.localtime(st.st_mtime))}
+    with open(filename, "rb") as f:
+        head = f.read(SCAN_BYTES)
+    pos = head.find(DATE_MARKER)
+    if pos >= 0:
+        tags["CreateDate"] = head[pos + len(DATE_MARKER):pos + len(DATE_MARKER) + 19].decode("ascii", "replace")
+    return tags
+
+def run(args):
+    out, err = [], []
+    files = []
+    skip_next = False
+    for i, arg in enumerate(args):
+        if skip_next:
+            skip_next = False
+        elif arg in ("-if", "-echo4"):
+            skip_next = True
+        elif not arg.startswith("-"):
+            files.append(arg)
+    existing = [f for f in files if os.path.isfile(f)]
+    for f in files:
+        if f not in existing:
+            err.append(f"Error: File not found - {f}")
+    if "-json" in args:
+        if existing:
+            out.append(json.dumps([read_tags(f) for f in existing], indent=1))
+    elif any(arg.startswith("-model=") for arg in args):
+        if existing:
+            out.append(f"    {len(existing)} image files updated")
+        if len(existing) != len(files):
+            out.append(f"    {len(files) - len(existing)} files weren't updated due to errors")
+    if "-echo4" in args:
+        err.append(args[args.index("-echo4") + 1])
+    return out, err
+
+def main():
+    args = []
+    for line in sys.stdin:
+        line = line.rstrip("\n")
+        m = re.match(r"-execute(\d*)$", line)
+        if m is None:
+            args.append(line)
+            if args[-2:] == ["-stay_open", "False"]:
+                return
+            continue
+        out, err = run(args)
+        for text in out:
+            sys.stdout.write(text + "\n")
+        sys.stdout.write("{ready%s}\n" % m.group(1))
+        sys.stdout.flush()
+        for text in err:
+            sys.stderr.write(text + "\n")
+        sys.stderr.flush()
+        args = []
+
+if __name__ == "__main__":
+    main()
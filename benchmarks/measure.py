@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+# Tested with Python 3.8 or above
+
+"""Run one of the photo-org scripts in this interpreter and write how it
+did to a JSON file:
+
+    python measure.py <stats.json> <script.py> [script args...]
+
+Bytes read come from /proc/self/io (Linux only), so they cover this
+process and not its children (ExifTool, --jobs workers).
+"""
+
+import sys
+import json
+import time
+import runpy
+from os import path
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+def read_proc_io():
+    counters = {}
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                name, value = line.split(":")
+                counters[name] = int(value)
+    except OSError:
+        pass
+    return counters
+
+def read_peak_rss_kb():
+    # VmHWM belongs to this program only, ru_maxrss also carries the peak
+    # of the process that forked us over the exec
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+
+def main():
+    stats_path, script = sys.argv[1], sys.argv[2]
+    sys.argv = sys.argv[2:]
+    sys.path.insert(0, path.dirname(path.abspath(script)))
+    exit_status = 0
+    tic = time.perf_counter()
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        exit_status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        exit_status = 1
+        raise
+    finally:
+        toc = time.perf_counter()
+        io = read_proc_io()
+        stats = {"seconds": toc - tic,
+                 "exit_status": exit_status,
+                 "bytes_read": io.get("rchar"),
+                 "storage_bytes_read": io.get("read_bytes"),
+                 "peak_rss_kb": read_peak_rss_kb()}
+        with open(stats_path, "w") as f:
+            json.dump(stats, f)
+    sys.exit(exit_status)
+
+if __name__ == "__main__":
+    main()
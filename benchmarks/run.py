@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+# Tested with Python 3.8 or above
+
+"""Benchmark the photo-org scripts against a generated corpus.
+
+    python -m benchmarks.run [--files N] [--size-kb K] [--output FILE]
+
+A deterministic corpus is generated once, then every tool runs against
+its own fresh copy with ExifTool replaced by benchmarks/fake_exiftool.py.
+Files/sec, bytes read and peak RSS of each run are printed and saved as
+JSON so runs can be compared.
+"""
+
+import os
+import sys
+import json
+import shlex
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from os import path
+from datetime import datetime
+
+from benchmarks import corpus
+
+BENCH_DIR = path.dirname(path.abspath(__file__))
+REPO_DIR = path.dirname(BENCH_DIR)
+TOOLS = ("photo-org", "clean-dups", "zap-model", "bulk_unzip")
+
+def write_exiftool_wrapper(workdir):
+    """ExifTool is started as a plain executable, so wrap the stand-in in a
+    script that runs it with this interpreter
+    """
+    wrapper = path.join(workdir, "exiftool")
+    with open(wrapper, "w") as f:
+        f.write("#!/bin/sh\nexec {} {} \"$@\"\n".format(shlex.quote(sys.executable),
+                                                      shlex.quote(path.join(BENCH_DIR, "fake_exiftool.py"))))
+    os.chmod(wrapper, 0o755)
+    return wrapper
+
+def count_files(root, extension=None):
+    return sum(1 for dirpath, dirnames, names in os.walk(root) for name in names
+               if extension is None or path.splitext(name)[1] == extension)
+
+def prepare(tool, master, workdir, extra_args):
+    """Lay out a fresh copy of the corpus for tool and return the script
+    arguments and the number of files it is going to process
+    """
+    run_dir = path.join(workdir, tool)
+    shutil.rmtree(run_dir, ignore_errors=True)
+    source = path.join(run_dir, "source")
+    shutil.copytree(master, source)
+    if tool == "photo-org":
+        target = path.join(run_dir, "target")
+        os.makedirs(target)
+        return [source, target] + extra_args, count_files(source)
+    if tool == "clean-dups":
+        return [source, "--report", path.join(run_dir, "report.json")] + extra_args, count_files(source)
+    if tool == "zap-model":
+        return [source, "NIKONZ6"] + extra_args, count_files(source, ".NEF")
+    if tool == "bulk_unzip":
+        zip_dir = path.join(run_dir, "zips")
+        members = corpus.make_archives(source, zip_dir)
+        shutil.rmtree(source)
+        return [zip_dir] + extra_args, members
+
+def run_tool(tool, args, workdir, exiftool, verbose):
+    stats_path = path.join(workdir, f"{tool}-stats.json")
+    script = path.join(REPO_DIR, tool + ".py")
+    # Keep whatever gets sent to the trash inside the work directory
+    env = dict(os.environ, EXIFTOOL_PATH=exiftool, XDG_DATA_HOME=path.join(workdir, "xdg"))
+    output = None if verbose else subprocess.DEVNULL
+    subprocess.run([sys.executable, path.join(BENCH_DIR, "measure.py"), stats_path, script] + args,
+                   env=env, cwd=REPO_DIR, stdout=output, stderr=output)
+    with open(stats_path) as f:
+        return json.load(f)
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument("--files", type=int, default=1000, help="number of files in the corpus")
+    parser.add_argument("--size-kb", type=int, default=128, help="average size of a JPEG in the corpus")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tools", default=",".join(TOOLS), help="comma separated tools to run")
+    for tool in TOOLS:
+        parser.add_argument(f"--{tool}-args", default="", metavar="ARGS",
+                            help=f"extra arguments passed to {tool}, e.g. '--jobs 4'")
+    parser.add_argument("--workdir", help="where to generate the corpus (a temporary directory by default)")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file the results are saved to")
+    parser.add_argument("--verbose", action="store_true", help="show the output of the tools")
+    args = parser.parse_args(argv[1:])
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="photo-org-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        master = path.join(workdir, "corpus")
+        shutil.rmtree(master, ignore_errors=True)
+        print(f"Generating {args.files} files in {master}", flush=True)
+        summary = corpus.generate(master, args.files, args.size_kb, args.seed)
+        exiftool = write_exiftool_wrapper(workdir)
+
+        results = []
+        for tool in args.tools.split(","):
+            extra_args = shlex.split(getattr(args, tool.replace("-", "_") + "_args"))
+            tool_args, num_files = prepare(tool, master, workdir, extra_args)
+            stats = run_tool(tool, tool_args, workdir, exiftool, args.verbose)
+            stats.update({"tool": tool, "args": extra_args, "files": num_files,
+                          "files_per_sec": num_files / stats["seconds"] if stats["seconds"] else None})
+            results.append(stats)
+            print("{:<11} {:>7} files {:>9.3f}s {:>9.1f} files/s {:>12} bytes read {:>9} KB peak RSS  (exit {})".format(
+                tool, num_files, stats["seconds"], stats["files_per_sec"] or 0,
+                stats["bytes_read"], stats["peak_rss_kb"], stats["exit_status"]), flush=True)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"created": datetime.now().isoformat(timespec="seconds"),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "corpus": {"files": summary["files"], "bytes": summary["bytes"], "seed": summary["seed"],
+                         "size_kb": args.size_kb},
+              "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,35 @@
+"""Organize your photos in one shot.
+
+    python -m photoorg <command> [args...]
+
+Importing the package is cheap: its modules, and the libraries they need,
+are only imported when first used. That keeps the command line fast to
+start, and lets other tools use the pieces in-process:
+
+    from photoorg import ExifProcessor
+
+    exif_proc = ExifProcessor("DSC_0001.NEF", use_gps_time=False)
+    exif_proc.process_exif()
+"""
+
+import importlib
+
+# Name exported by the package -> module it comes from
+_EXPORTS = {
+    "ExifProcessor": "organize",
+    "Organizer": "organize",
+    "ExifToolPool": "exiftool_client",
+    "LibraryIndex": "library_index",
+    "SourceJournal": "source_journal",
+    "Walker": "walker",
+}
+
+__all__ = sorted(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    globals()[name] = value
+    return value
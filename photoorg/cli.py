@@ -0,0 +1,38 @@
+# Tested with Python 3.8 or above
+
+import sys
+import importlib
+
+PROG = "photoorg"
+# Sub-command -> (module implementing it, what it does). A module is only
+# imported when its command runs.
+COMMANDS = {
+    "organize": ("organize", "move photos into a library of dated directories"),
+    "dedup": ("dedup", "report (and trash) duplicate and similar files"),
+    "unzip": ("unzip", "extract every zip archive of a directory"),
+    "zap-model": ("zap_model", "set the camera model of NEF files"),
+}
+
+def usage():
+    lines = [f"usage: {PROG} <command> [args...]", "", "commands:"]
+    for command, (module, description) in COMMANDS.items():
+        lines.append(f"  {command:<12} {description}")
+    lines.append("")
+    lines.append(f"Run '{PROG} <command> --help' for the arguments of a command.")
+    return "\n".join(lines)
+
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    if len(argv) < 2 or argv[1] in ("-h", "--help"):
+        print(usage())
+        return 0 if len(argv) >= 2 else 2
+    command = COMMANDS.get(argv[1])
+    if command is None:
+        print(f"{PROG}: unknown command '{argv[1]}'\n\n{usage()}", file=sys.stderr)
+        return 2
+    module = importlib.import_module("." + command[0], __package__)
+    module.main([f"{PROG} {argv[1]}"] + argv[2:])
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
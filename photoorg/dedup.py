@@ -0,0 +1,178 @@
+# Tested with Python 3.8 or above
+
+import sys
+import os
+from os import path
+import json
+import argparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import re
+from . import library_index
+from . import perceptual_hash
+from . import walker
+
+HELP_MESSAGE = "%(prog)s <path> [DELETE] [--report FILE] [--jobs N] [--similar [DISTANCE]] [--hash {dhash,phash}]"
+# How much of the head and of the tail of a file goes into its partial hash
+PARTIAL_HASH_BYTES = 64 * 1024
+
+def walk_sizes(thePath):
+    """Group every file under thePath by its size"""
+    by_size = defaultdict(list)
+    for entry in walker.Walker().entries(thePath):
+        if library_index.is_index_file(entry.path):
+            continue
+        by_size[entry.stat().st_size].append(entry.path)
+    return by_size
+
+def partial_hash(filename):
+    """SHA-256 of the first and last PARTIAL_HASH_BYTES of the file"""
+    import hashlib
+    sha256_hash = hashlib.sha256()
+    with open(filename, "rb") as f:
+        sha256_hash.update(f.read(PARTIAL_HASH_BYTES))
+        f.seek(-PARTIAL_HASH_BYTES, os.SEEK_END)
+        sha256_hash.update(f.read(PARTIAL_HASH_BYTES))
+    return sha256_hash.hexdigest()
+
+def split_by_hash(groups, hash_func, executor):
+    """Hash every file of every group on the thread pool and split each group
+    into the sub-groups of files sharing the same hash. Files left alone in
+    their sub-group are unique and dropped.
+    """
+    filenames = [filename for group in groups for filename in group]
+    hashes = dict(zip(filenames, executor.map(hash_func, filenames)))
+    result = []
+    for group in groups:
+        by_hash = defaultdict(list)
+        for filename in group:
+            by_hash[hashes[filename]].append(filename)
+        result.extend((digest, files) for digest, files in by_hash.items() if len(files) > 1)
+    return result
+
+def find_duplicates(by_size, jobs):
+    """Return the groups of byte-identical files out of the files grouped
+    by walk_sizes() as a list of (size, sha256, [filenames]). Files are
+    grouped by size first, then by a hash of their head and tail, and only
+    the files still colliding after that are read in full.
+    """
+    duplicates = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        small, large = [], []
+        for size, files in by_size.items():
+            # Empty files carry no content to compare
+            if size == 0 or len(files) < 2:
+                continue
+            if size <= 2 * PARTIAL_HASH_BYTES:
+                small.append(files)
+            else:
+                large.append(files)
+        # The partial hash of a small file already covers all of it
+        for digest, files in split_by_hash(small, library_index.hash_file, executor):
+            duplicates.append((path.getsize(files[0]), digest, files))
+        candidates = [files for digest, files in split_by_hash(large, partial_hash, executor)]
+        for digest, files in split_by_hash(candidates, library_index.hash_file, executor):
+            duplicates.append((path.getsize(files[0]), digest, files))
+    return duplicates
+
+def choose_original(files):
+    """Pick the file to keep out of a duplicate group. photo-org gives a
+    -1, -2... suffix to colliding names, so prefer a name without one,
+    then the shortest path.
+    """
+    def rank(filename):
+        filename_prefix, extension = path.splitext(filename)
+        return (re.search(r"-\d+$", filename_prefix) is not None, len(filename), filename)
+    return min(files, key=rank)
+
+def find_similar(by_size, duplicates, thePath, algorithm, max_distance, jobs):
+    """Return the groups of images that look alike but are not byte-identical,
+    as lists of (filename, distance to the kept image). Only the kept file of
+    each duplicate group is compared. The largest file of a group is kept,
+    it is the least likely to have been resized or recompressed.
+    """
+    extra = set(filename for size, digest, files in duplicates
+                for filename in files if filename != choose_original(files))
+    images = sorted(filename for files in by_size.values() for filename in files
+                    if perceptual_hash.is_image(filename) and filename not in extra)
+    cache = perceptual_hash.HashCache(thePath, algorithm)
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            groups = perceptual_hash.find_similar(images, cache, executor, max_distance)
+    finally:
+        cache.close()
+    result = []
+    for group in groups:
+        sizes = {filename: path.getsize(filename) for filename, value in group}
+        keep, keep_hash = max(group, key=lambda item: (sizes[item[0]], item[0]))
+        result.append((keep, sizes[keep],
+                       sorted((filename, perceptual_hash.hamming(value, keep_hash), sizes[filename])
+                              for filename, value in group if filename != keep)))
+    return result
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog=argv[0], usage=HELP_MESSAGE)
+    parser.add_argument("path")
+    parser.add_argument("delete", nargs="?", choices=["DELETE"],
+                        help="send all but one file of every duplicate group to the trash")
+    parser.add_argument("--report", metavar="FILE",
+                        help="write the duplicate groups as JSON to FILE ('-' for stdout)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of threads hashing files")
+    parser.add_argument("--similar", type=int, nargs="?", const=perceptual_hash.DEFAULT_MAX_DISTANCE,
+                        metavar="DISTANCE",
+                        help="also report images that look alike, up to DISTANCE bits of perceptual hash "
+                             f"apart (default {perceptual_hash.DEFAULT_MAX_DISTANCE}); they are never trashed")
+    parser.add_argument("--hash", choices=sorted(perceptual_hash.ALGORITHMS), default="dhash",
+                        help="perceptual hash used by --similar")
+    args = parser.parse_args(argv[1:])
+    thePath = args.path
+    send_to_trash = args.delete == 'DELETE'
+    print(f"Path to cleanup: {thePath}\n")
+    if not path.isdir(thePath):
+        print(f"ERROR: Path must be a valid directory")
+        sys.exit(1)
+    if args.similar is not None and not perceptual_hash.have_pillow():
+        print(f"ERROR: --similar needs Pillow (pip install Pillow)")
+        sys.exit(1)
+
+    report = {"path": path.abspath(thePath), "groups": [], "duplicate_files": 0, "duplicate_bytes": 0}
+    by_size = walk_sizes(thePath)
+    duplicates = find_duplicates(by_size, args.jobs)
+    for size, digest, files in sorted(duplicates, key=lambda group: group[2]):
+        original = choose_original(files)
+        extra = sorted(filename for filename in files if filename != original)
+        report["groups"].append({"size": size, "sha256": digest, "keep": original, "duplicates": extra})
+        report["duplicate_files"] += len(extra)
+        report["duplicate_bytes"] += size * len(extra)
+        for filename in extra:
+            if send_to_trash:
+                from send2trash import send2trash
+                print("Sending to trash: {} (duplicate of {}, {} bytes)".format(filename, original, size))
+                send2trash(filename)
+            else:
+                print("Candidate file for trash: {} (duplicate of {}, {} bytes)".format(filename, original, size))
+    print(f"\n{report['duplicate_files']} duplicate files in {len(report['groups'])} groups, {report['duplicate_bytes']} bytes")
+
+    if args.similar is not None:
+        report["similar_groups"] = []
+        report["similar_files"] = 0
+        for keep, size, similar in find_similar(by_size, duplicates, thePath, args.hash, args.similar, args.jobs):
+            report["similar_groups"].append({"keep": keep, "size": size, "similar": [
+                {"path": filename, "distance": distance, "size": similar_size}
+                for filename, distance, similar_size in similar]})
+            report["similar_files"] += len(similar)
+            for filename, distance, similar_size in similar:
+                print("Similar image: {} (looks like {}, {} bits apart, {} bytes)".format(
+                    filename, keep, distance, similar_size))
+        print(f"{report['similar_files']} similar images in {len(report['similar_groups'])} groups")
+
+    if args.report == '-':
+        print(json.dumps(report, indent=2))
+    elif args.report is not None:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main(sys.argv)
+    sys.exit(0)
@@ -0,0 +1,202 @@
+# Tested with Python 3.8 or above
+
+import os
+from os import path
+import sys
+import time
+import errno
+import struct
+import select
+
+# How long a file has to keep the same size and mtime before it is picked
+# up, cameras and sync clients write files in several goes
+DEFAULT_SETTLE_SECONDS = 2.0
+# How often the source is rescanned when inotify is not available
+DEFAULT_POLL_SECONDS = 5.0
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+# struct inotify_event without its variable length name
+_EVENT = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    import ctypes
+    import ctypes.util
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, "inotify_init1"):
+        return None
+    return libc
+
+
+def _errno():
+    import ctypes
+    return ctypes.get_errno()
+
+
+class InotifyWatcher:
+    """Reports the files written under root, as told by inotify.
+
+    Every directory gets its own watch. A directory created later is
+    watched as soon as its event arrives, and whatever already landed in
+    it by then is reported too. When the kernel queue overflows events
+    are lost, overflowed is then set and the caller has to rescan.
+    """
+    def __init__(self, root, libc):
+        self.libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        self.overflowed = False
+        self._watch_tree(root, [])
+
+    def _watch_tree(self, dirpath, found):
+        """Watch dirpath and its sub-directories, adding the files in them to found"""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+        if wd < 0:
+            err = _errno()
+            if err == errno.ENOENT:
+                return
+            raise OSError(err, os.strerror(err), dirpath)
+        self.dirs[wd] = dirpath
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir():
+                        self._watch_tree(entry.path, found)
+                    else:
+                        found.append(entry.path)
+        except FileNotFoundError:
+            pass
+
+    def poll(self, timeout):
+        """Wait up to timeout seconds and return the paths that changed"""
+        found = []
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return found
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return found
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+            elif mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+            elif wd in self.dirs and name:
+                filename = path.join(self.dirs[wd], os.fsdecode(name))
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and not path.basename(filename).startswith('.'):
+                        self._watch_tree(filename, found)
+                else:
+                    found.append(filename)
+        return found
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback for when inotify is not there (other platforms, some
+    network mounts): rescan the source every interval seconds and report
+    the files that are new or changed since the last scan.
+    """
+    def __init__(self, root, file_walker, interval=DEFAULT_POLL_SECONDS):
+        self.root = root
+        self.file_walker = file_walker
+        self.interval = interval
+        self.overflowed = False
+        self.seen = {}
+        self.next_scan = time.monotonic()
+
+    def poll(self, timeout):
+        wait = self.next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(wait, 0))
+        self.next_scan = time.monotonic() + self.interval
+        found = []
+        seen = {}
+        for entry in self.file_walker.entries(self.root):
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            seen[entry.path] = (st.st_size, st.st_mtime_ns)
+            if self.seen.get(entry.path) != seen[entry.path]:
+                found.append(entry.path)
+        self.seen = seen
+        return found
+
+    def close(self):
+        pass
+
+def open_watcher(root, file_walker, poll_interval=DEFAULT_POLL_SECONDS):
+    """inotify when the platform has it, polling otherwise"""
+    libc = _load_libc()
+    if libc is not None:
+        try:
+            return InotifyWatcher(root, libc)
+        except OSError as e:
+            print(f"WARN: inotify not available ({e}), polling {root} every {poll_interval}sec instead")
+    return PollingWatcher(root, file_walker, poll_interval)
+
+
+class SettleTracker:
+    """Holds on to the files reported by a watcher until they have stopped
+    growing: a file is ready once its size and mtime have not changed for
+    settle seconds. Files that disappear in the meantime are forgotten.
+    Ready files come out in the order they were added, so a directory
+    walked into the tracker keeps the walker's order.
+    """
+    def __init__(self, settle=DEFAULT_SETTLE_SECONDS):
+        self.settle = settle
+        self.pending = {}
+
+    def add(self, filename):
+        # (size, mtime) is filled in by the next check
+        self.pending[filename] = (None, time.monotonic())
+
+    def timeout(self, idle):
+        """How long the watcher may block: idle when nothing is pending"""
+        return min(idle, self.settle / 2) if self.pending else idle
+
+    def ready(self):
+        now = time.monotonic()
+        result = []
+        for filename, (signature, since) in list(self.pending.items()):
+            try:
+                st = os.stat(filename)
+            except FileNotFoundError:
+                del self.pending[filename]
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if current != signature:
+                self.pending[filename] = (current, now)
+            elif now - since >= self.settle:
+                del self.pending[filename]
+                result.append(filename)
+        return result
@@ -0,0 +1,192 @@
+# Tested with Python 3.8 or above
+
+import os
+import re
+import json
+import queue
+import atexit
+import threading
+import subprocess
+
+# Location of the ExifTool executable. It can be overridden with the
+# EXIFTOOL_PATH environment variable so the same scripts run on machines
+# where ExifTool lives somewhere else.
+EXIFTOOL_PATH = os.environ.get('EXIFTOOL_PATH', r'c:\Users\Family\Downloads\exiftool-12.05\exiftool.exe')
+
+# The only tags we care about when reading metadata. 'time:all' pulls every
+# date/time tag ExifTool knows about (DateTimeOriginal, GPSDateTime, the
+# QuickTime create dates, file dates...) so we can still pick the oldest one.
+DATE_TAGS = ('-time:all', '-Model')
+
+# What ExifTool writes once a request is done, {ready} followed by its number
+READY_MARKER = re.compile(r"\{ready\d*\}$")
+
+def check_args(args):
+    """Arguments go to ExifTool one per line, a newline in one of them
+    would split it into two
+    """
+    for arg in args:
+        if "\n" in arg or "\r" in arg:
+            raise ValueError(f"ExifTool can't be given an argument with a line break: {arg!r}")
+
+
+class ExifToolWorker:
+    """A single long-lived `exiftool -stay_open True -@ -` process.
+
+    Arguments for a request are written one per line to the stdin pipe,
+    followed by -executeNUM. ExifTool answers with {readyNUM} on stdout
+    once the request is done, and we ask it to echo the same marker on
+    stderr so both streams can be read up to the end of the request.
+    stderr is drained on a thread of its own, as ExifTool would stall on
+    a full stderr pipe while we wait for stdout. File names are passed
+    as UTF-8 whatever the platform.
+    """
+    def __init__(self, executable=None):
+        self.executable = executable or EXIFTOOL_PATH
+        self.seq = 0
+        self.proc = subprocess.Popen([self.executable, '-stay_open', 'True', '-@', '-',
+                                      '-common_args', '-charset', 'filename=utf8'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            encoding='UTF-8')
+        self._stderr = queue.Queue()
+        self._on_stderr = None
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True,
+                                               name=f"exiftool-stderr-{self.proc.pid}")
+        self._stderr_thread.start()
+
+    def execute(self, *args, on_stderr=None):
+        """Run one ExifTool request and return its (stdout, stderr) text.
+        When on_stderr is given it is called with every stderr line as it
+        arrives, from another thread, and the stderr returned is empty.
+        """
+        check_args(args)
+        self._on_stderr = on_stderr
+        self.seq += 1
+        marker = "{{ready{}}}".format(self.seq)
+        lines = list(args) + ['-echo4', marker, '-execute{}'.format(self.seq)]
+        self.proc.stdin.write("\n".join(lines) + "\n")
+        self.proc.stdin.flush()
+        stdout = self._read_until(self.proc.stdout, marker)
+        stderr = self._stderr.get()
+        self._on_stderr = None
+        if stderr is None:
+            raise ProcessLookupError(f"ExifTool process {self.executable} exited unexpectedly")
+        return stdout, stderr
+
+    def _drain_stderr(self):
+        """Collect stderr up to each marker and hand it to execute, which
+        reads the requests back in the order they were sent. None means
+        the process is gone.
+        """
+        output = []
+        try:
+            for line in self.proc.stderr:
+                if READY_MARKER.match(line.rstrip()):
+                    self._stderr.put("".join(output))
+                    output = []
+                elif self._on_stderr is not None:
+                    self._on_stderr(line)
+                else:
+                    output.append(line)
+        except (OSError, ValueError):
+            pass
+        self._stderr.put(None)
+
+    def _read_until(self, stream, marker):
+        output = []
+        while True:
+            line = stream.readline()
+            if line == "":
+                raise ProcessLookupError(f"ExifTool process {self.executable} exited unexpectedly")
+            if line.rstrip() == marker:
+                return "".join(output)
+            output.append(line)
+
+    def close(self):
+        if self.proc.poll() is None:
+            try:
+                self.proc.stdin.write("-stay_open\nFalse\n")
+                self.proc.stdin.flush()
+                self.proc.wait(timeout=5)
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                self.proc.kill()
+                self.proc.wait()
+
+
+class ExifToolPool:
+    """Hands out up to `size` ExifToolWorker processes to callers.
+
+    Workers are only started the first time they are needed, so a pool
+    used by a single thread never costs more than one ExifTool process.
+    The most recently used worker is handed out first.
+    """
+    def __init__(self, size=None, executable=None):
+        self.size = size or os.cpu_count() or 1
+        self.executable = executable
+        self._idle = []
+        self._workers = []
+        self._cond = threading.Condition()
+
+    def _acquire(self):
+        with self._cond:
+            # Wait for an idle worker, or for room to start one, which is
+            # also what a broken worker leaves behind
+            while not self._idle and len(self._workers) >= self.size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            worker = ExifToolWorker(self.executable)
+            self._workers.append(worker)
+            return worker
+
+    def _release(self, worker, broken=False):
+        with self._cond:
+            if broken:
+                self._workers.remove(worker)
+            else:
+                self._idle.append(worker)
+            self._cond.notify()
+
+    def execute(self, *args, on_stderr=None):
+        check_args(args)
+        worker = self._acquire()
+        try:
+            result = worker.execute(*args, on_stderr=on_stderr)
+        except (OSError, ValueError, ProcessLookupError):
+            # The worker is in an unknown state, throw it away so the next
+            # caller gets a fresh process
+            self._release(worker, broken=True)
+            worker.close()
+            raise
+        self._release(worker)
+        return result
+
+    def get_tags(self, filename, tags=DATE_TAGS):
+        """Return the requested tags of filename as a dict keyed by tag name"""
+        stdout, stderr = self.execute('-json', *tags, filename)
+        if stderr.strip():
+            print(f"  ExifTool: {stderr.strip()}")
+        if not stdout.strip():
+            return {}
+        return json.loads(stdout)[0]
+
+    def close(self):
+        with self._cond:
+            workers, self._workers, self._idle = self._workers, [], []
+        for worker in workers:
+            worker.close()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+def get_pool(size=None):
+    """Return the process wide ExifToolPool, creating it on first use"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ExifToolPool(size)
+            atexit.register(_default_pool.close)
+        elif size is not None and size > _default_pool.size:
+            _default_pool.size = size
+        return _default_pool
@@ -0,0 +1,126 @@
+# Tested with Python 3.8 or above
+
+import os
+from os import path
+import errno
+import shutil
+import sys
+from . import read_ahead
+
+# Size of the buffer used when copying across devices
+COPY_BLOCK_SIZE = 1024 * 1024
+# Errors of os.link on file systems without hard links (FAT, exFAT, some
+# network shares)
+LINK_UNSUPPORTED = (errno.EPERM, errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOSYS, errno.EMLINK)
+# Errors of copy_file_range/sendfile when the pair of files can't use them
+KERNEL_COPY_UNSUPPORTED = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSOCK)
+
+def same_device(src, dst):
+    """True when src can be renamed to dst (dst itself does not exist yet)"""
+    return os.stat(src).st_dev == os.stat(path.dirname(path.abspath(dst))).st_dev
+
+def move_file(src, dst, sha256=None):
+    """Move src to dst and return the SHA-256 of the file if it is known.
+    An existing dst is never replaced, FileExistsError is raised instead.
+
+    On the same device this is a hard link and an unlink, and nothing is
+    read. Across devices the file is copied, checked and then the source
+    is removed: when sha256 is not known yet it is computed from the same
+    reads that feed the copy, otherwise the kernel copies the data with
+    copy_file_range/sendfile without it ever reaching Python.
+    """
+    if same_device(src, dst):
+        try:
+            rename_exclusive(src, dst)
+            return sha256
+        except FileExistsError:
+            raise
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+    try:
+        if sha256 is None:
+            sha256 = _copy_and_hash(src, dst)
+        else:
+            _copy_in_kernel(src, dst)
+        if os.stat(src).st_size != os.stat(dst).st_size:
+            raise OSError(f"Copy of {src} to {dst} is incomplete")
+        shutil.copystat(src, dst)
+    except FileExistsError:
+        # dst is somebody else's file, leave it alone
+        raise
+    except BaseException:
+        if path.isfile(dst):
+            os.remove(dst)
+        raise
+    os.remove(src)
+    return sha256
+
+def rename_exclusive(src, dst):
+    """Rename src to dst unless dst exists. os.rename would silently
+    replace it, a hard link can't.
+    """
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        raise
+    except OSError as e:
+        if e.errno not in LINK_UNSUPPORTED:
+            raise
+        # No hard links here: claim the name first, then rename over the
+        # empty file that holds it
+        os.close(os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)))
+        try:
+            os.replace(src, dst)
+        except BaseException:
+            os.remove(dst)
+            raise
+        return
+    try:
+        os.unlink(src)
+    except BaseException:
+        os.unlink(dst)
+        raise
+
+def _copy_and_hash(src, dst):
+    import hashlib
+    sha256_hash = hashlib.sha256()
+    buf = read_ahead.block_buffer()
+    view = memoryview(buf)
+    with open(src, 'rb', buffering=0) as fsrc, open(dst, 'xb', buffering=0) as fdst:
+        read_ahead.advise_sequential(fsrc.fileno())
+        while True:
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            sha256_hash.update(view[:n])
+            fdst.write(view[:n])
+    return sha256_hash.hexdigest()
+
+def _copy_in_kernel(src, dst):
+    with open(src, 'rb') as fsrc, open(dst, 'xb') as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        copy = getattr(os, 'copy_file_range', None)
+        if copy is None and sys.platform.startswith('linux'):
+            # Elsewhere (macOS, BSD) sendfile only writes to sockets
+            copy = getattr(os, 'sendfile', None)
+        if copy is None:
+            shutil.copyfileobj(fsrc, fdst, COPY_BLOCK_SIZE)
+            return
+        offset = 0
+        try:
+            while offset < size:
+                if copy is os.sendfile:
+                    sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, COPY_BLOCK_SIZE)
+                else:
+                    sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(), COPY_BLOCK_SIZE, offset, offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError as e:
+            # Not every pair of file systems supports it, do it in Python
+            if e.errno not in KERNEL_COPY_UNSUPPORTED:
+                raise
+            fsrc.seek(offset)
+            fdst.seek(offset)
+            shutil.copyfileobj(fsrc, fdst, COPY_BLOCK_SIZE)
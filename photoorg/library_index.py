@@ -0,0 +1,101 @@
+# Tested with Python 3.8 or above
+
+import os
+from os import path
+import sqlite3
+from . import read_ahead
+
+# The index lives at the root of the target library
+INDEX_FILENAME = ".photo-org-index.sqlite"
+# How many files to hash before committing while rebuilding the index
+REBUILD_COMMIT_EVERY = 1000
+
+def hash_file(filename):
+    """Return the SHA-256 hex digest of the whole file"""
+    import hashlib
+    sha256_hash = hashlib.sha256()
+    # Large reads straight into a reused buffer, the per-call overhead of
+    # small reads dominates on network shares and card readers
+    buf = read_ahead.block_buffer()
+    view = memoryview(buf)
+    with open(filename, "rb", buffering=0) as f:
+        read_ahead.advise_sequential(f.fileno())
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            sha256_hash.update(view[:n])
+    return sha256_hash.hexdigest()
+
+def is_index_file(filename):
+    """True for the index database and the journal sqlite keeps next to it"""
+    return path.basename(filename).startswith(INDEX_FILENAME)
+
+
+class LibraryIndex:
+    """On-disk index of the files photo-org placed in the target library.
+
+    For every file it keeps the size, mtime and SHA-256 so a collision
+    check only has to hash the incoming file, and only when the sizes
+    match. A file is never hashed twice unless it changed on disk. Paths
+    are stored relative to the library root.
+    """
+    def __init__(self, root):
+        self.root = path.abspath(root)
+        self.conn = sqlite3.connect(path.join(self.root, INDEX_FILENAME))
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS files ("
+                              "path TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                              "mtime INTEGER NOT NULL, sha256 TEXT)")
+
+    def _key(self, filename):
+        return path.relpath(path.abspath(filename), self.root)
+
+    def get_hash(self, filename):
+        """Return the SHA-256 of a library file, from the index when the
+        size and mtime on disk still match what was recorded
+        """
+        st = os.stat(filename)
+        row = self.conn.execute("SELECT size, mtime, sha256 FROM files WHERE path = ?",
+                                (self._key(filename),)).fetchone()
+        if row is not None and row[2] is not None and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        sha256 = hash_file(filename)
+        with self.conn:
+            self._store(filename, st, sha256)
+        return sha256
+
+    def record(self, filename, sha256=None):
+        """Record a file that was just placed in the library. When the hash
+        is not known yet it is left empty and computed on the first
+        collision with the file.
+        """
+        st = os.stat(filename)
+        with self.conn:
+            self._store(filename, st, sha256)
+
+    def _store(self, filename, st, sha256):
+        self.conn.execute("INSERT OR REPLACE INTO files (path, size, mtime, sha256) VALUES (?, ?, ?, ?)",
+                          (self._key(filename), st.st_size, st.st_mtime_ns, sha256))
+
+    def rebuild(self):
+        """Throw the index away and re-hash every file under the root"""
+        print(f"Rebuilding index of {self.root}")
+        count = 0
+        with self.conn:
+            self.conn.execute("DELETE FROM files")
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            for name in filenames:
+                filename = path.join(dirpath, name)
+                if is_index_file(filename):
+                    continue
+                self._store(filename, os.stat(filename), hash_file(filename))
+                count += 1
+                if count % REBUILD_COMMIT_EVERY == 0:
+                    self.conn.commit()
+                    print(f"  {count} files indexed", flush=True)
+        self.conn.commit()
+        print(f"Done indexing {count} files")
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,1030 @@
+# Tested with Python 3.8 or above
+
+import sys
+import time
+import signal
+import argparse
+import os
+from os import path
+import re
+import functools
+from datetime import datetime, timezone
+from collections import deque
+from . import library_index
+from . import zip_source
+from . import fast_move
+from . import source_journal
+from . import run_stats
+from . import walker
+from . import drop_watch
+from . import read_ahead
+
+HELP_MESSAGE = "%(prog)s <source-path|archive.zip> <target-path> [--gpstime] [--jobs N] [--dry-run] [--retry-failed]\n                      [--verbose] [--events FILE] [--profile FILE]\n                      [--include GLOB] [--exclude GLOB] [--prune GLOB] [--scan-threads N]\n                      [--watch] [--settle SECONDS] [--poll-interval SECONDS]\n                      [--read-ahead N] [--read-ahead-mb MB]\n       %(prog)s --rebuild-index <target-path>"
+DEBUG_MODE = False
+DEFAULT_CAMERA = "nikon-z-6_2"
+# GPS times are in UTC, the camera clock is set to this timezone
+CAMERA_TIMEZONE = "US/Eastern"
+# The EXIF header we need (Image Model and DateTimeOriginal) sits at the very
+# start of JPEG, NEF and CR2 files, so we first only allow exifread to read
+# this much of the file before falling back to a full parse.
+METADATA_READ_LIMIT = 256 * 1024
+# What a usable EXIF or ExifTool date/time looks like
+DATE_TIME_PATTERN = re.compile(r"\d{4}:\d{2}:\d{2} \d{2}:\d{2}:\d{2}")
+SUPPORTED_EXTENSIONS = ('.jpg', '.JPG', '.jpeg', '.JPEG', '.avi', '.MOV', '.AVI', '.CR2', '.NEF', '.3gp', '.AAE', '.HEIC', '.mov', '.mp4', '.mpg', '.m4v', '.MP4')
+ARCHIVE_EXTENSIONS = ('.zip', '.ZIP')
+# Sidecars are only imported along with the photo they belong to
+SIDECAR_EXTENSIONS = ('.xmp', '.XMP')
+# Which member of a capture group (RAW+JPEG, HEIC+AAE+MOV Live Photo...) to
+# read the metadata from: the cheapest to parse that has any
+CAPTURE_READ_ORDER = ('.jpg', '.jpeg', '.cr2', '.nef', '.heic', '.mov', '.mp4', '.m4v', '.avi', '.mpg', '.3gp',
+                      '.aae', '.xmp')
+# Files exifread can't read, their metadata always comes from ExifTool
+EXIFTOOL_EXTENSIONS = ('.heic', '.mov', '.mp4', '.m4v', '.avi', '.mpg', '.3gp', '.aae', '.xmp')
+
+def debug(msg):
+    """Per-file progress, only shown with --verbose as printing it for
+    every file of a big import is a cost of its own
+    """
+    if DEBUG_MODE:
+        print(msg)
+
+@functools.lru_cache(maxsize=None)
+def camera_timezone():
+    """The zoneinfo of CAMERA_TIMEZONE, loaded once. pytz is only used on
+    Pythons without zoneinfo, or without the tz database (Windows).
+    """
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(CAMERA_TIMEZONE)
+    except (ImportError, LookupError):
+        import pytz
+        return pytz.timezone(CAMERA_TIMEZONE)
+
+class BoundedReader:
+    """File wrapper handed to exifread that counts the bytes it reads and,
+    when a limit is given, pretends the file ends at that limit.
+    """
+    def __init__(self, f, limit=None):
+        self.f = f
+        self.limit = limit
+        self.bytes_read = 0
+        self.truncated = False
+
+    def read(self, size=-1):
+        if self.limit is not None:
+            remaining = self.limit - self.f.tell()
+            if size < 0 or size > remaining:
+                self.truncated = True
+                size = max(remaining, 0)
+        data = self.f.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def seek(self, offset, whence=0):
+        return self.f.seek(offset, whence)
+
+    def tell(self):
+        return self.f.tell()
+
+class ExifProcessor:
+    def __init__(self, filename, use_gps_time, archive_path=None):
+        # When archive_path is given, filename is the name of a member of
+        # that zip archive rather than a file on disk
+        self.filename = filename
+        self.archive_path = archive_path
+        self.spooled_filename = None
+        # Where an archive member is extracted when it needs a real path:
+        # the target library, so that copy is later moved into place
+        # instead of the member being extracted a second time
+        self.spool_dir = None
+        self.target_filename = None
+        self.tags = {}
+        self.use_gps_time = use_gps_time
+        self.bytes_read = 0
+        # (filename, data, size) of the head of the file when it was read
+        # ahead, see read_ahead
+        self.head = None
+        # Seconds spent in each phase for this file, see run_stats
+        self.timings = {}
+
+    def __str__(self):
+        if self.archive_path is not None:
+            return f"{self.archive_path}:{self.filename}"
+        return self.filename
+
+    def process_exif(self):
+        self.filename_prefix, self.extension = path.splitext(self.filename)
+        if self.extension is not None and len(self.extension) != 0 and self._is_supported_extension(self.extension):
+            try:
+                f = None
+                if self._mandate_exiftool_cmd(self.extension):
+                    raise ValueError("{} extension requires ExifTool".format(self.extension))
+                f = self._open()
+                self.tags = self._read_exif_tags(f)
+                # It's possible Image Model is not found when we processed the exif but the rest of
+                # EXIF data is useable. In which case, let's just set the Image Model to 'unknown'
+                # which becomes part of the filename.
+                if self.tags.get('Image Model') is None:
+                    self.tags['Image Model'] = DEFAULT_CAMERA
+                #print(f"Tags: {self.tags}")
+                if len(self.tags) == 0 or self.tags.get('EXIF DateTimeOriginal') is None:
+                    # We couldn't get any EXIF data from the file, we have
+                    # to resort using command line tool ExifTool instead
+                    debug("  WARN: Could not find any EXIF data, using ExifTool instead!")
+                    self._read_exiftool_date_time()
+                f.close()
+            except ValueError as ve:
+                # Value error means we couldn't even recognize values when doing the
+                # parsing, so we reesort to using ExifTool
+                self.tags['Image Model'] = DEFAULT_CAMERA
+                debug(f"  WARN: ValueError during parse {ve}, using ExifTool instead!")
+                self._read_exiftool_date_time()
+            except Exception as e:
+                print("Exception processing Exif in file [{}]: {}".format(self, e))
+                raise e
+            finally:
+                if f and not f.closed:
+                    f.close()
+        else:
+            raise NotImplementedError("Extension of file is not supported: {}".format(self.extension))
+
+    def adopt_metadata(self, other):
+        """Use the metadata another member of the same capture group read,
+        in place of process_exif()
+        """
+        self.filename_prefix, self.extension = path.splitext(self.filename)
+        self.tags = dict(other.tags)
+
+    def _read_exif_tags(self, f):
+        """Parse just enough of the file to get the Image Model and EXIF
+        DateTimeOriginal. Only when those could not be found within the first
+        METADATA_READ_LIMIT bytes do we let exifread parse the whole file.
+        """
+        import exifread
+        reader = BoundedReader(f, METADATA_READ_LIMIT)
+        try:
+            with run_stats.timed(self.timings, 'exifread'):
+                tags = exifread.process_file(reader, strict=True, details=False, stop_tag='DateTimeOriginal')
+        except Exception:
+            if not reader.truncated:
+                raise
+            tags = None
+        self.bytes_read += reader.bytes_read
+        # The date may also have been found but cut short by the limit
+        if reader.truncated and (tags is None or
+                                 DATE_TIME_PATTERN.match(str(tags.get('EXIF DateTimeOriginal', ''))) is None):
+            debug(f"  Metadata not found in the first {METADATA_READ_LIMIT} bytes, parsing the full file")
+            reader = BoundedReader(f)
+            with run_stats.timed(self.timings, 'exifread'):
+                tags = exifread.process_file(reader, strict=True)
+            self.bytes_read += reader.bytes_read
+        debug(f"  Metadata read: {self.bytes_read} bytes (file size {self.get_size()} bytes)")
+        return tags
+
+    def _read_exiftool_date_time(self):
+        """Ask the shared ExifTool pool for the date/time tags of the file and
+        store the oldest usable one as the EXIF DateTimeOriginal
+        """
+        from . import exiftool_client
+        with run_stats.timed(self.timings, 'exiftool'):
+            exiftool_tags = exiftool_client.get_pool().get_tags(self._get_local_filename())
+        # As we loop through, we're going to capture all the time-based tags
+        # and later sort the list so we can visually inspect which tags we're
+        # using most of the time.
+        candidate_time_tags = []
+        for tag, value in exiftool_tags.items():
+            date_time = str(value)[0:19]
+            if DATE_TIME_PATTERN.search(date_time) is not None:
+                # The tag we're on is a timestamp
+                candidate_time_tags.append((tag, date_time))
+        candidate_time_tags.sort(key=lambda tup: tup[1])
+        if candidate_time_tags and candidate_time_tags[0][0] == 'ProfileDateTime':
+            debug("    Removing Profile Date Time as it skews results: {}".format(candidate_time_tags.pop(0)))
+        if candidate_time_tags and candidate_time_tags[0][0] == 'GPSDateTime' and not self.use_gps_time:
+            debug("    Removing GPS Date/Time: {}".format(candidate_time_tags.pop(0)))
+        while candidate_time_tags and candidate_time_tags[0][1] in ('0000:00:00 00:00:00', '1970:01:01 00:00:00'):
+            debug("    Removing bad date time of: {}".format(candidate_time_tags.pop(0)))
+        debug("    Candidate time tags found: {}".format(candidate_time_tags))
+        if not candidate_time_tags:
+            # Not a ValueError, which process_exif answers by asking ExifTool again
+            raise LookupError(f"ExifTool found no usable date/time in {self}")
+        # Pick off the oldest timestamp off the list of candidate times
+        self.tags['EXIF DateTimeOriginal'] = candidate_time_tags[0][1]
+        if candidate_time_tags[0][0] == 'GPSDateTime':
+            # If we are indeed using GPS time, it comes in UTC time. Generally, my camera
+            # will be set to eastern time, so we'll convert that.
+            est = camera_timezone()
+            utc = timezone.utc
+            fmt = '%Y:%m:%d %H:%M:%S'
+            # Pull out the current time, and create datetime object in UTC
+            c = candidate_time_tags[0][1]
+            gps_time = datetime(int(c[0:4]), int(c[5:7]), int(c[8:10]), int(c[11:13]), int(c[14:16]), int(c[17:19]), tzinfo=utc)
+            self.tags['EXIF DateTimeOriginal'] = gps_time.astimezone(est).strftime(fmt)
+            debug("Converted GPS Date/Time to Eastern: {}".format(self.tags['EXIF DateTimeOriginal']))
+
+    def _open(self):
+        if self.archive_path is not None:
+            return zip_source.open_member(self.archive_path, self.filename)
+        if self.head is not None:
+            return read_ahead.PrefetchedFile(*self.head)
+        return open(self.filename, 'rb')
+
+    def _get_local_filename(self):
+        """Path of the file on disk. Archive members are extracted to a
+        temporary file in spool_dir the first time this is needed. That
+        copy is what gets moved into the target, or removed by cleanup().
+        """
+        if self.archive_path is None:
+            return self.filename
+        if self.spooled_filename is None:
+            self.spooled_filename = zip_source.spool_member(self.archive_path, self.filename, self.spool_dir)
+        return self.spooled_filename
+
+    def get_size(self):
+        if self.archive_path is not None and self.spooled_filename is None:
+            return zip_source.member_size(self.archive_path, self.filename)
+        return path.getsize(self._get_local_filename())
+
+    def get_hash(self):
+        if self.archive_path is not None and self.spooled_filename is None:
+            return zip_source.hash_member(self.archive_path, self.filename)
+        return library_index.hash_file(self._get_local_filename())
+
+    def move_to(self, new_filename, sha256=None):
+        """Move the file to new_filename. Returns the SHA-256 of the file
+        when it is known or was computed on the way, None otherwise.
+        """
+        if self.archive_path is None:
+            return fast_move.move_file(self.filename, new_filename, sha256)
+        if self.spooled_filename is None:
+            return zip_source.copy_member(self.archive_path, self.filename, new_filename)
+        sha256 = fast_move.move_file(self.spooled_filename, new_filename, sha256)
+        self.spooled_filename = None
+        return sha256
+
+    def cleanup(self):
+        """Remove the temporary copy of an archive member, if there is one"""
+        if self.spooled_filename is not None:
+            if path.isfile(self.spooled_filename):
+                os.remove(self.spooled_filename)
+            self.spooled_filename = None
+
+    def discard(self):
+        """Get rid of the source, as an identical copy is already in the target"""
+        if self.archive_path is None:
+            from send2trash import send2trash
+            debug(f"  Moving to trash as file already exists: {self.filename}")
+            send2trash(self.filename)
+        else:
+            debug(f"  Skipping as file already exists: {self}")
+            self.cleanup()
+
+    def get_target_path(self, target_path):
+        """Given the provided target_path, build the final target path
+        with a generated sub-directory for where the input file should
+        be copied
+        """
+        #print("  Available tags: {}".format(self.tags.keys()))
+        debug("EXIF DateTimeOriginal before: {}".format(self.tags["EXIF DateTimeOriginal"]))
+
+        # When the exif reading library works on modern images, then
+        # the date is an actual object of IfdTag. We want to standardize
+        # the date type to a string
+        if not isinstance(self.tags["EXIF DateTimeOriginal"], str):
+            debug("IfdTag for date - standardizing as string")
+            self.tags["EXIF DateTimeOriginal"] = str(self.tags["EXIF DateTimeOriginal"])
+
+        # Some dates come in like so: 2016-09-05_08:00:28
+        # Hence, we'll first replace '_' with spaces
+        self.tags["EXIF DateTimeOriginal"] = self.tags["EXIF DateTimeOriginal"].replace('_', ' ')
+
+        # If the filename itself ends with a date/time string, then
+        # we will trust THAT time instead of the one given to us by
+        # exif. This is because for some video files, exif will simply
+        # give us the current date which is NOT what we want.
+        # We use a regex with the filename to see if there's a match.
+        dtm_in_name = self._get_dtm_from_filename(self.filename)
+        if dtm_in_name is not None:
+            self.tags["EXIF DateTimeOriginal"] = dtm_in_name
+        origDtm  = self.tags["EXIF DateTimeOriginal"]
+        debug(f"EXIF DateTimeOriginal: {origDtm}")
+        fmtDtm   = self._format_dtm(str(origDtm))
+        stdPath  = self._get_path_from_date(target_path, str(origDtm))
+        model    = self.tags["Image Model"]
+        fmtModel = self._format_model(str(model))
+        baseFilename, extension = split_capture_ext(path.basename(self.filename))
+        fmtBaseFilename = baseFilename.lower().replace(" ", "-")
+        stdFilename = f"{fmtDtm}-{fmtModel}-{fmtBaseFilename}{extension}"
+        newFilename = path.join(stdPath, stdFilename)
+        # The directory is only created when the file is actually moved
+        self.target_filename = newFilename
+        return newFilename
+
+    def _get_dtm_from_filename(self, filename):
+        base_filename, ext = path.splitext(path.basename(filename))
+        # Search for the date/time which will be at the very end of
+        # the filename (not including extension)
+        x = re.search(r"\d{8}_\d{6}$", base_filename)
+        if x is not None:
+            # pull out the group, which will be the date as so
+            # '20180624_122120'
+            x = x.group()
+            # Let's add the colons etc for how we expect the date to be
+            # for the exif date, which is like so '2016:05:21 15:36:00'
+            x = "{}:{}:{} {}:{}:{}".format(x[0:4], x[4:6], x[6:8], x[9:11], x[11:13], x[13:15])
+        else:
+            # first search failed, let's try another we found on burst
+            # shots from Nexus/Google phones
+            # Date is embedded in filename as such: burst20160728094841
+            # or may have filename ending with: burst20160728094841_cover
+            # or may just have _20160728094841 so we make this regex general
+            x = re.search(r"(\d{14})(_cover)?$", base_filename)
+            if x is not None:
+                y = x.group(1)
+                x = "{}:{}:{} {}:{}:{}".format(y[0:4], y[4:6], y[6:8], y[8:10], y[10:12], y[12:14])
+        return x
+
+    def _is_supported_extension(self, ext):
+        if ext in SUPPORTED_EXTENSIONS or ext in SIDECAR_EXTENSIONS:
+            return True
+        return False
+
+    def _mandate_exiftool_cmd(self, ext):
+        if ext in ('.HEIC'):
+            return True
+        return False
+
+    def _format_dtm(self, orig_dtm):
+        # Some bad data had shown this for the time:
+        # 2007:09:07 15:17: 6
+        # Notice the blank between the last ':' and the '6'.
+        # That means we'll just do our best instead to pull out the time
+        # from the hour/minute and ignore seconds.
+        dtm_fields = orig_dtm.split(" ")
+        theDate = dtm_fields[0]
+        theTime = dtm_fields[1]
+        fmtDate = theDate.replace(":", "")
+        fmtTime = theTime.replace(":", "")
+        return fmtDate + "-" + fmtTime
+
+    def _get_path_from_date(self, rootDir, origDtm):
+        dtm_fields = origDtm.split(" ")
+        theDate = dtm_fields[0]
+        theYear, theMonth, theDay = theDate.split(":")
+        return path.join(rootDir, theYear, theMonth, theDay)
+
+    def _format_model(self, imageModel):
+        return imageModel.lower().replace(" ", "-")
+
+def split_capture_ext(filename):
+    """path.splitext, except that a sidecar named after the whole name of
+    its photo (DSC_0001.NEF.xmp) keeps both extensions
+    """
+    base, ext = path.splitext(filename)
+    if ext in SIDECAR_EXTENSIONS and path.splitext(base)[1] in SUPPORTED_EXTENSIONS:
+        base, photo_ext = path.splitext(base)
+        ext = photo_ext + ext
+    return base, ext
+
+def walk_files(srcPath, file_walker=None):
+    """Walker stage: yield (filename, archive_path) for every supported file
+    under srcPath. Files are filtered on their extension before anything
+    else looks at them. Zip archives are not extracted, each of their
+    members is yielded with the archive it comes from.
+    """
+    if zip_source.is_zip(srcPath):
+        for member in zip_source.list_members(srcPath):
+            if path.splitext(member)[1] in SUPPORTED_EXTENSIONS + SIDECAR_EXTENSIONS:
+                yield member, srcPath
+        return
+    if file_walker is None:
+        file_walker = walker.Walker(SUPPORTED_EXTENSIONS + SIDECAR_EXTENSIONS + ARCHIVE_EXTENSIONS)
+    for filename in file_walker.files(srcPath):
+        #print(f"Listing: {filename}")
+        if zip_source.is_zip(filename):
+            yield from walk_files(filename)
+        else:
+            yield filename, None
+
+def is_sidecar(filename):
+    return path.splitext(filename)[1] in SIDECAR_EXTENSIONS
+
+def capture_stem(filename):
+    """Directory and name shared by the files of one capture: DSC_0001.NEF,
+    DSC_0001.JPG and DSC_0001.NEF.xmp all have the stem DSC_0001
+    """
+    return path.normcase(split_capture_ext(filename)[0])
+
+def capture_read_rank(filename):
+    ext = path.splitext(filename)[1].lower()
+    return CAPTURE_READ_ORDER.index(ext) if ext in CAPTURE_READ_ORDER else len(CAPTURE_READ_ORDER)
+
+def capture_groups(files):
+    """Grouping stage: cluster the (filename, archive_path, identity) coming
+    from the walker into capture groups, the files sharing a directory and
+    a stem. The walker lists a directory (or an archive) in one go, so a
+    group is complete once the next directory starts. Groups holding
+    nothing but sidecars are yielded too, their photo may already be in
+    the library.
+    """
+    def flush(groups):
+        yield from groups.values()
+    groups = {}
+    current = None
+    for member in files:
+        filename, archive_path, identity = member
+        where = archive_path if archive_path is not None else path.dirname(filename)
+        if where != current:
+            yield from flush(groups)
+            groups = {}
+            current = where
+        groups.setdefault(capture_stem(filename), []).append(member)
+    yield from flush(groups)
+
+def capture_leader(members):
+    """The member of a capture group its metadata is read from first"""
+    return min(members, key=lambda member: capture_read_rank(member[0]))
+
+def prepare_group(members, use_gps_time, trgPath, head=None):
+    """Read the metadata of a capture group, given as (filename, archive_path)
+    members, and compute where each member should go. The metadata is read
+    once, from the cheapest member that has any, and shared by the others
+    so that siblings always land in the same dated directory. head is what
+    was read ahead of that member, if anything. Archive members ExifTool
+    has to read are extracted into trgPath. This is the expensive
+    stage, so it is the one run in the worker pool when --jobs is used. It
+    never touches the source files or the target names. Sidecars alone
+    have no metadata to read, their target is left to None.
+    """
+    exif_procs = [ExifProcessor(filename, use_gps_time, archive_path) for filename, archive_path in members]
+    if all(is_sidecar(exif_proc.filename) for exif_proc in exif_procs):
+        return [(exif_proc, None) for exif_proc in exif_procs]
+    for exif_proc in exif_procs:
+        exif_proc.spool_dir = trgPath
+        if head is not None and exif_proc.archive_path is None and exif_proc.filename == head[0]:
+            exif_proc.head = head
+    error = None
+    try:
+        for exif_proc in sorted(exif_procs, key=lambda exif_proc: capture_read_rank(exif_proc.filename)):
+            debug("Found file: {}".format(exif_proc))
+            try:
+                exif_proc.process_exif()
+                leader = exif_proc
+                break
+            except NotImplementedError:
+                raise
+            except Exception as e:
+                error = e
+        else:
+            raise error
+    except BaseException:
+        # Nothing of the group will be moved
+        for exif_proc in exif_procs:
+            exif_proc.cleanup()
+        raise
+    finally:
+        # The plan keeps the processors around, not the data read ahead
+        for exif_proc in exif_procs:
+            exif_proc.head = None
+    results = []
+    for exif_proc in exif_procs:
+        if exif_proc is not leader:
+            debug("  Sharing the metadata of {} with {}".format(leader, exif_proc))
+            exif_proc.adopt_metadata(leader)
+        with run_stats.timed(exif_proc.timings, 'target_path'):
+            new_filename = exif_proc.get_target_path(trgPath)
+        results.append((exif_proc, new_filename))
+    return results
+
+def set_debug_mode(debug_mode):
+    # Worker processes don't necessarily inherit the globals of main
+    global DEBUG_MODE
+    DEBUG_MODE = debug_mode
+
+
+class TargetNames:
+    """In-memory view of the file names taken in the dated target
+    directories. Each directory is listed with a single scandir the first
+    time it is needed, and names planned during the run are added as they
+    are assigned, so finding a free -1, -2... suffix never stats the disk.
+    """
+    def __init__(self):
+        self.dirs = {}
+        self.next_suffix = {}
+
+    def _names(self, dirpath):
+        names = self.dirs.get(dirpath)
+        if names is None:
+            names = set()
+            try:
+                with os.scandir(dirpath) as it:
+                    names.update(path.normcase(entry.name) for entry in it)
+            except FileNotFoundError:
+                pass
+            self.dirs[dirpath] = names
+        return names
+
+    def exists(self, filename):
+        return path.normcase(path.basename(filename)) in self._names(path.dirname(filename))
+
+    def add(self, filename):
+        self._names(path.dirname(filename)).add(path.normcase(path.basename(filename)))
+
+    def next_unique(self, filename):
+        """Return the first free "<name>-N<ext>" for filename. Names are only
+        ever added during a run, so the search resumes where the last one
+        for the same name stopped.
+        """
+        return self.next_unique_group([filename])[0]
+
+    def next_unique_group(self, filenames):
+        """Same as next_unique for the files of a capture group, which all
+        get the same -N suffix so they keep sharing their name
+        """
+        def with_suffix(filename, suffix):
+            base, ext = split_capture_ext(filename)
+            return f"{base}-{suffix}{ext}"
+        suffix = max(self.next_suffix.get(filename, 1) for filename in filenames)
+        while any(self.exists(with_suffix(filename, suffix)) for filename in filenames):
+            suffix += 1
+        for filename in filenames:
+            self.next_suffix[filename] = suffix + 1
+        return [with_suffix(filename, suffix) for filename in filenames]
+
+
+class PlannedFile:
+    """What the plan decided for one source file"""
+    def __init__(self, identity, exif_proc=None, outcome=None, target=None, detail=None):
+        self.identity = identity
+        self.exif_proc = exif_proc
+        self.outcome = outcome
+        self.target = target
+        # The target before any -N suffix was added
+        self.base_target = target
+        self.detail = detail
+        self.src_hash = None
+
+    def get_hash(self):
+        if self.src_hash is None:
+            self.src_hash = self.exif_proc.get_hash()
+        return self.src_hash
+
+    def __str__(self):
+        if self.outcome == source_journal.MOVED:
+            return f"MOVE  {self.exif_proc} --> {self.target}"
+        if self.outcome == source_journal.TRASHED:
+            return f"TRASH {self.exif_proc} (same as {self.target})"
+        return f"{self.outcome.upper():<5} {self.identity[0]}: {self.detail}"
+
+
+class Organizer:
+    """Runs one import into the target library in two steps. The plan
+    reads every file's metadata and decides, in walk order, where each one
+    goes or whether it duplicates something already in (or headed for) the
+    library. Executing the plan then moves the files, journals every
+    outcome and times every phase.
+    """
+    def __init__(self, trgPath, use_gps_time, index, journal, stats, retry_failed=False, file_walker=None,
+                 prefetcher=None):
+        self.trgPath = trgPath
+        self.file_walker = file_walker
+        self.prefetcher = prefetcher
+        self.use_gps_time = use_gps_time
+        self.index = index
+        self.journal = journal
+        self.stats = stats
+        self.retry_failed = retry_failed
+        self.names = TargetNames()
+        self.planned_targets = {}
+        self.created_dirs = set()
+
+    def pending_files(self, srcPath):
+        """Yield (filename, archive_path, identity) for every file under
+        srcPath the journal does not already have a final outcome for
+        """
+        return self.pending(walk_files(srcPath, self.file_walker))
+
+    def pending(self, files):
+        """Same as pending_files, for (filename, archive_path) coming from
+        any iterator
+        """
+        files = iter(files)
+        while True:
+            with self.stats.phase('walk'):
+                item = next(files, None)
+                if item is not None:
+                    filename, archive_path = item
+                    identity = self.journal.identify(filename, archive_path)
+                    skip = self.journal.should_skip(identity, self.retry_failed)
+            if item is None:
+                return
+            if skip:
+                self.stats.count('skipped (journal)')
+            else:
+                yield filename, archive_path, identity
+
+    def _is_duplicate(self, planned, new_filename):
+        """Compare the file with what is at, or planned for, new_filename.
+        Only hash when the sizes match, and the hash of a file already in the
+        library normally comes straight out of the library index.
+        """
+        other = self.planned_targets.get(path.normcase(new_filename))
+        try:
+            other_size = other.exif_proc.get_size() if other else path.getsize(new_filename)
+        except FileNotFoundError:
+            # Removed from the library since its directory was listed
+            return False
+        if planned.exif_proc.get_size() != other_size:
+            return False
+        with self.stats.phase('hash'):
+            other_hash = other.get_hash() if other else self.index.get_hash(new_filename)
+            return planned.get_hash() == other_hash
+
+    def _journaled_target(self, group):
+        """Target of a member of the group that an earlier, interrupted run
+        already moved (or found in the library), None when there is none
+        """
+        keys = set(planned.identity[0] for planned in group)
+        key = group[0].identity[0]
+        stem = capture_stem(key)
+        for other, outcome, target in self.journal.recorded_under(split_capture_ext(key)[0]):
+            if (other not in keys and target is not None and capture_stem(other) == stem and
+                    outcome in (source_journal.MOVED, source_journal.TRASHED)):
+                return target
+        return None
+
+    def place_group(self, group, taken=None):
+        """Pick the targets of a capture group as a unit, so its members
+        always end up sharing a name. A member whose target holds the same
+        file is trashed. If a target holds a different file, the whole
+        group moves under the first -N suffix that is free for every member,
+        including the members that were duplicates under the plain name.
+        A group partly imported by an earlier run takes the name taken, the
+        target its imported members already have.
+        """
+        if taken is not None:
+            taken_dir = path.dirname(taken)
+            taken_stem = split_capture_ext(path.basename(taken))[0]
+            for planned in group:
+                ext = split_capture_ext(path.basename(planned.exif_proc.filename))[1]
+                planned.target = path.join(taken_dir, taken_stem + ext)
+                if planned.base_target is None:
+                    planned.base_target = planned.target
+                debug(f"  Joining the members imported earlier: {planned.target}")
+        conflict = False
+        for planned in group:
+            planned.outcome = source_journal.MOVED
+            # Check if the new file name is already taken
+            if self.names.exists(planned.target):
+                self.stats.count('name collisions')
+                if self._is_duplicate(planned, planned.target):
+                    planned.outcome = source_journal.TRASHED
+                else:
+                    conflict = True
+        if conflict:
+            new_filenames = self.names.next_unique_group([planned.base_target for planned in group])
+            for planned, new_filename in zip(group, new_filenames):
+                planned.outcome, planned.target = source_journal.MOVED, new_filename
+                debug(f"  New uniq name found: {new_filename}")
+        for planned in group:
+            if planned.outcome == source_journal.MOVED:
+                self.names.add(planned.target)
+                self.planned_targets[path.normcase(planned.target)] = planned
+
+    def plan_group(self, get_results, identities):
+        """Decide what happens to the prepared files of one capture group.
+        get_results returns what prepare_group returned, or raises what it
+        raised.
+        """
+        group = [PlannedFile(identity) for identity in identities]
+        try:
+            results = get_results()
+            for planned, (exif_proc, new_filename) in zip(group, results):
+                planned.exif_proc = exif_proc
+                planned.target = planned.base_target = new_filename
+                self.stats.add_timings(exif_proc.timings)
+                self.stats.count('metadata bytes read', exif_proc.bytes_read)
+            if len(group) > 1 and group[0].target is not None:
+                self.stats.count('metadata reads shared', len(group) - 1)
+            with self.stats.phase('plan'):
+                taken = self._journaled_target(group)
+                if group[0].target is None and taken is None:
+                    # Sidecars whose photo is neither here nor imported yet
+                    for planned in group:
+                        planned.outcome = source_journal.UNPLACED
+                        planned.detail = "no photo to go with in the library"
+                else:
+                    self.place_group(group, taken)
+        except NotImplementedError as nie:
+            # Just print the stack, but move on
+            debug(nie)
+            for planned in group:
+                planned.outcome, planned.detail = source_journal.UNSUPPORTED, str(nie)
+        except Exception as e:
+            # Remember the failure so the next run does not try again, unless
+            # asked to with --retry-failed
+            for planned in group:
+                print(f"  ERROR: could not process {planned.identity[0]}: {e!r}\n")
+                planned.outcome, planned.detail = source_journal.FAILED, repr(e)
+        for planned in group:
+            if planned.outcome not in (source_journal.MOVED, source_journal.TRASHED) and planned.exif_proc:
+                planned.exif_proc.cleanup()
+        return group
+
+    def plan(self, files, executor=None, jobs=1):
+        """Plan the pending files, on the worker pool when there is one"""
+        if executor is not None:
+            return self.plan_parallel(files, executor, jobs)
+        return self.plan_sequential(files)
+
+    def prefetched_groups(self, files):
+        """Yield (capture group, head) for the capture groups of files, with
+        the head of the member planned first read ahead by the prefetcher
+        """
+        groups = capture_groups(files)
+        if self.prefetcher is None:
+            for group in groups:
+                yield group, None
+            return
+        def leader_filename(group):
+            # Nothing to read ahead for ExifTool, it opens the file itself
+            filename, archive_path, identity = capture_leader(group)
+            if archive_path is not None or path.splitext(filename)[1].lower() in EXIFTOOL_EXTENSIONS:
+                return None
+            return filename
+        for group, head in self.prefetcher.iterate(groups, leader_filename):
+            if head is not None:
+                self.stats.count('bytes read ahead', len(head[1]))
+            yield group, head
+
+    def plan_sequential(self, files):
+        plan = []
+        for group, head in self.prefetched_groups(files):
+            members = [(filename, archive_path) for filename, archive_path, identity in group]
+            plan.extend(self.plan_group(lambda: prepare_group(members, self.use_gps_time, self.trgPath, head),
+                                        [identity for filename, archive_path, identity in group]))
+        return plan
+
+    def plan_parallel(self, files, executor, jobs):
+        # The walker feeds a bounded window of capture groups to the pool, and
+        # results are planned strictly in walk order so collisions are resolved
+        # exactly like in the sequential mode.
+        plan = []
+        max_in_flight = jobs * 4
+        in_flight = deque()
+        groups = self.prefetched_groups(files)
+        while True:
+            for group, head in groups:
+                members = [(filename, archive_path) for filename, archive_path, identity in group]
+                future = executor.submit(prepare_group, members, self.use_gps_time, self.trgPath, head)
+                in_flight.append((future, [identity for filename, archive_path, identity in group]))
+                if len(in_flight) >= max_in_flight:
+                    break
+            if not in_flight:
+                break
+            future, identities = in_flight.popleft()
+            plan.extend(self.plan_group(future.result, identities))
+        return plan
+
+    def _ensure_dir(self, dirpath):
+        if dirpath not in self.created_dirs:
+            if not path.isdir(dirpath):
+                debug(f"Creating new path: {dirpath}")
+                os.makedirs(dirpath, exist_ok=True)
+            self.created_dirs.add(dirpath)
+
+    def execute_file(self, planned):
+        """Carry out the plan for one file and journal the outcome"""
+        exif_proc = planned.exif_proc
+        try:
+            if planned.outcome == source_journal.MOVED:
+                debug(f"  FROM : {exif_proc} --> TO: {planned.target}")
+                with self.stats.phase('move'):
+                    self._ensure_dir(path.dirname(planned.target))
+                    while True:
+                        try:
+                            src_hash = exif_proc.move_to(planned.target, planned.src_hash)
+                            break
+                        except FileExistsError:
+                            # Something took the name after the plan was made
+                            self.stats.count('names taken since planned')
+                            self.names.add(planned.target)
+                            planned.target = self.names.next_unique(planned.base_target)
+                            debug(f"  Target taken, new uniq name found: {planned.target}")
+                    self.index.record(planned.target, src_hash)
+            elif planned.outcome == source_journal.TRASHED:
+                # Means files are identical, so instead of re-copying,
+                # we'll move it into our special Pictures trash
+                with self.stats.phase('trash'):
+                    exif_proc.discard()
+        except Exception as e:
+            print(f"  ERROR: could not process {exif_proc}: {e!r}\n")
+            planned.outcome, planned.detail = source_journal.FAILED, repr(e)
+        debug("")
+        self.journal.record(planned.identity, planned.outcome, planned.target, planned.detail)
+        self.stats.count(planned.outcome)
+        self.stats.event(file=planned.identity[0], outcome=planned.outcome, target=planned.target,
+                         detail=planned.detail,
+                         bytes_read=exif_proc.bytes_read if exif_proc else None,
+                         timings=exif_proc.timings if exif_proc else None)
+
+    def execute(self, plan):
+        for planned in plan:
+            self.execute_file(planned)
+
+    def import_batch(self, files, executor=None, jobs=1):
+        """Plan and execute one batch of --watch mode. The target names are
+        listed again for every batch, as files may have been added to or
+        removed from the library by hand since the last one. Whatever the
+        plan knew about targets is on disk afterwards, so it is dropped
+        rather than kept for the lifetime of the daemon.
+        """
+        self.names = TargetNames()
+        self.created_dirs.clear()
+        plan = []
+        try:
+            plan = self.plan(self.pending(files), executor, jobs)
+            self.execute(plan)
+        finally:
+            for planned in plan:
+                if planned.exif_proc is not None:
+                    planned.exif_proc.cleanup()
+        self.planned_targets.clear()
+        self.journal.commit()
+        return plan
+
+    def watch(self, srcPath, executor=None, jobs=1, settle=drop_watch.DEFAULT_SETTLE_SECONDS,
+              poll_interval=drop_watch.DEFAULT_POLL_SECONDS):
+        """Daemon mode: import what is already in srcPath, then every file
+        that lands there, each once it has stopped growing. Files already
+        there may still be being written when the daemon starts, so they
+        wait for the same settle time as new ones. The ExifTool
+        processes, the worker pool and the library index stay warm between
+        batches, and only the new files are looked at.
+        """
+        watcher = drop_watch.open_watcher(srcPath, self.file_walker, poll_interval)
+        tracker = drop_watch.SettleTracker(settle)
+        print(f"Watching {srcPath} ({type(watcher).__name__}), press Ctrl-C to stop", flush=True)
+        try:
+            for filename in self.file_walker.files(srcPath):
+                tracker.add(filename)
+            while True:
+                for filename in watcher.poll(tracker.timeout(poll_interval)):
+                    if self.file_walker.wants(srcPath, filename):
+                        tracker.add(filename)
+                if watcher.overflowed:
+                    # Events were lost, look at everything again. The journal
+                    # skips what was already imported.
+                    print("WARN: missed file events, rescanning the source", flush=True)
+                    watcher.overflowed = False
+                    for filename in self.file_walker.files(srcPath):
+                        tracker.add(filename)
+                ready = tracker.ready()
+                if not ready:
+                    continue
+                files = [member for filename in ready for member in
+                         (walk_files(filename) if zip_source.is_zip(filename) else [(filename, None)])]
+                tic = time.perf_counter()
+                plan = self.import_batch(files, executor, jobs)
+                if plan:
+                    outcomes = {}
+                    for planned in plan:
+                        outcomes[planned.outcome] = outcomes.get(planned.outcome, 0) + 1
+                    print("{} imported {} files in {:0.3f}sec: {}".format(
+                        datetime.now().strftime('%Y-%m-%d %H:%M:%S'), len(plan), time.perf_counter() - tic,
+                        ", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items()))),
+                        flush=True)
+        finally:
+            watcher.close()
+
+    def print_plan(self, plan):
+        """Dry run: show what executing the plan would do"""
+        for planned in plan:
+            print(planned)
+            self.stats.count(planned.outcome)
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog=argv[0], usage=HELP_MESSAGE)
+    parser.add_argument("source", nargs="?")
+    parser.add_argument("target", nargs="?")
+    parser.add_argument("--gpstime", action="store_true",
+                        help="trust the GPS Date/Time when it is the oldest timestamp")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="number of worker processes reading EXIF in parallel")
+    parser.add_argument("--include", action="append", default=[], metavar="GLOB",
+                        help="only import files matching GLOB (name, or path relative to the source)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="skip files matching GLOB")
+    parser.add_argument("--prune", action="append", default=[], metavar="GLOB",
+                        help="skip whole directories matching GLOB")
+    parser.add_argument("--scan-threads", type=int, default=1,
+                        help="number of top-level directories scanned at the same time")
+    parser.add_argument("--read-ahead", type=int, default=read_ahead.READ_AHEAD_FILES, metavar="N",
+                        help="read the metadata of the next N files while the current one is processed "
+                             "(0 to disable, not used with --jobs)")
+    parser.add_argument("--read-ahead-mb", type=int, default=read_ahead.READ_AHEAD_BYTES // (1024 * 1024), metavar="MB",
+                        help="most memory the read-ahead may hold")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and import every file that lands in the source directory")
+    parser.add_argument("--settle", type=float, default=drop_watch.DEFAULT_SETTLE_SECONDS, metavar="SECONDS",
+                        help="with --watch, how long a file must stop growing before it is imported")
+    parser.add_argument("--poll-interval", type=float, default=drop_watch.DEFAULT_POLL_SECONDS, metavar="SECONDS",
+                        help="with --watch, how often the source is rescanned when inotify is not available")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only print where every file would go, nothing is moved")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="process again the files the journal records as failed")
+    parser.add_argument("--verbose", action="store_true",
+                        help="print what happens to every file")
+    parser.add_argument("--events", metavar="FILE",
+                        help="append one JSON line per processed file to FILE")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="run under cProfile, save the stats to FILE and print the top functions")
+    parser.add_argument("--rebuild-index", metavar="TARGET",
+                        help="re-hash every file of the target library into its index and exit")
+    args = parser.parse_args(argv[1:])
+    set_debug_mode(args.verbose)
+    if args.rebuild_index is not None:
+        if not path.isdir(args.rebuild_index):
+            print(f"ERROR: Target path must be a valid directory")
+            sys.exit(1)
+        index = library_index.LibraryIndex(args.rebuild_index)
+        index.rebuild()
+        index.close()
+        return
+    if args.source is None or args.target is None:
+        parser.error("both <source-path> and <target-path> are required")
+    srcPath = args.source
+    trgPath = args.target
+    use_gps_time = args.gpstime
+
+    print(f"Source Path: {srcPath}\nTarget Path: {trgPath}")
+    if not path.isdir(srcPath) and not (zip_source.is_zip(srcPath) and path.isfile(srcPath)):
+        print(f"ERROR: Source path must be a valid directory or zip archive")
+        sys.exit(1)
+    if path.isdir(trgPath) == False:
+        print(f"ERROR: Target path must be a valid directory")
+        sys.exit(1)
+    if args.watch and (args.dry_run or not path.isdir(srcPath)):
+        parser.error("--watch needs a source directory and can't be combined with --dry-run")
+
+    index = library_index.LibraryIndex(trgPath)
+    journal = source_journal.SourceJournal(srcPath, trgPath)
+    stats = run_stats.RunStats(args.events)
+    file_walker = walker.Walker(SUPPORTED_EXTENSIONS + SIDECAR_EXTENSIONS + ARCHIVE_EXTENSIONS, args.include, args.exclude,
+                                args.prune, threads=args.scan_threads)
+    prefetcher = None
+    # With --jobs the workers already keep jobs * 4 files in flight
+    if args.read_ahead > 0 and args.jobs <= 1:
+        prefetcher = read_ahead.Prefetcher(read_ahead.READ_AHEAD_REGION, args.read_ahead, args.read_ahead_mb * 1024 * 1024)
+    organizer = Organizer(trgPath, use_gps_time, index, journal, stats, args.retry_failed, file_walker, prefetcher)
+    def run():
+        executor = None
+        if args.jobs > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=args.jobs, initializer=set_debug_mode, initargs=(DEBUG_MODE,))
+        try:
+            if args.watch:
+                organizer.watch(srcPath, executor, args.jobs, args.settle, args.poll_interval)
+                return
+            plan = []
+            try:
+                plan = organizer.plan(organizer.pending_files(srcPath), executor, args.jobs)
+                if args.dry_run:
+                    organizer.print_plan(plan)
+                else:
+                    organizer.execute(plan)
+            finally:
+                for planned in plan:
+                    if planned.exif_proc is not None:
+                        planned.exif_proc.cleanup()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    if args.watch:
+        # Stop the daemon the same way on Ctrl-C and on a plain kill
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        if args.profile is not None:
+            import cProfile
+            import pstats
+            profiler = cProfile.Profile()
+            try:
+                profiler.runcall(run)
+            finally:
+                profiler.dump_stats(args.profile)
+                pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+        else:
+            run()
+    except KeyboardInterrupt:
+        if not args.watch:
+            raise
+    finally:
+        journal.close()
+        index.close()
+        stats.close()
+        print(stats.summary())
+
+if __name__ == "__main__":
+    main(sys.argv)
+    sys.exit(0)
@@ -0,0 +1,294 @@
+# Tested with Python 3.8 or above
+
+import io
+import os
+from os import path
+import sqlite3
+from math import cos, pi
+
+# Imported by have_pillow()
+Image = None
+
+# The cache lives at the root of the directory being scanned
+CACHE_FILENAME = ".photo-org-phash.sqlite"
+CACHE_COMMIT_EVERY = 500
+# Files that carry an image, or at least an EXIF thumbnail of one
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff', '.cr2', '.nef')
+# Hashes are HASH_SIZE x HASH_SIZE = 64 bits
+HASH_SIZE = 8
+PHASH_SCALE = 4
+# Hamming distance up to which two images are considered the same picture
+DEFAULT_MAX_DISTANCE = 10
+
+# How far into a JPEG the EXIF segment is looked for
+EXIF_SEARCH_LIMIT = 64 * 1024
+
+# How to undo each EXIF orientation, as in PIL.ImageOps.exif_transpose
+_ORIENTATIONS = {2: "FLIP_LEFT_RIGHT", 3: "ROTATE_180", 4: "FLIP_TOP_BOTTOM",
+                 5: "TRANSPOSE", 6: "ROTATE_270", 7: "TRANSVERSE", 8: "ROTATE_90"}
+
+def have_pillow():
+    """Import Pillow, which is only needed to look for near-duplicates.
+    False when it is not installed.
+    """
+    global Image
+    if Image is None:
+        try:
+            from PIL import Image as pil_image
+        except ImportError:
+            return False
+        Image = pil_image
+    return True
+
+def is_image(filename):
+    return path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+def _bits_to_int(bits):
+    value = 0
+    for bit in bits:
+        value = (value << 1) | bit
+    return value
+
+def dhash(image):
+    """Difference hash: whether each pixel of a 9x8 grayscale version of
+    the image is brighter than its right neighbour
+    """
+    small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR)
+    pixels = list(small.getdata())
+    width = HASH_SIZE + 1
+    return _bits_to_int(pixels[row * width + col] > pixels[row * width + col + 1]
+                        for row in range(HASH_SIZE) for col in range(HASH_SIZE))
+
+def _dct_table(n, k):
+    """Cosines of the first k frequencies of an n point DCT-II"""
+    return [[cos(pi * u * (2 * x + 1) / (2 * n)) for x in range(n)] for u in range(k)]
+
+_DCT_TABLE = _dct_table(HASH_SIZE * PHASH_SCALE, HASH_SIZE)
+
+def phash(image):
+    """DCT hash: whether each of the 8x8 lowest frequencies of a 32x32
+    grayscale version of the image is above their median
+    """
+    n = HASH_SIZE * PHASH_SCALE
+    table = _DCT_TABLE
+    pixels = list(image.convert("L").resize((n, n), Image.BILINEAR).getdata())
+    rows = [[sum(c * p for c, p in zip(coefs, pixels[y * n:(y + 1) * n])) for coefs in table]
+            for y in range(n)]
+    freqs = [sum(table[v][y] * rows[y][u] for y in range(n))
+             for v in range(HASH_SIZE) for u in range(HASH_SIZE)]
+    # The DC term only says how bright the image is overall
+    median = sorted(freqs[1:])[len(freqs) // 2 - 1]
+    return _bits_to_int(freq > median for freq in freqs)
+
+ALGORITHMS = {"dhash": dhash, "phash": phash}
+
+def _orient(image, orientation):
+    method = _ORIENTATIONS.get(orientation)
+    if method is None:
+        return image
+    try:
+        transpose = getattr(Image.Transpose, method)
+    except AttributeError:
+        # Pillow < 9.1 has the constants on the module
+        transpose = getattr(Image, method)
+    return image.transpose(transpose)
+
+def _read_thumbnail(f, tags):
+    """Read the JPEG thumbnail the thumbnail IFD points to. exifread only
+    extracts it itself when it parses everything (details=True).
+    """
+    offset = tags.get("Thumbnail JPEGInterchangeFormat")
+    length = tags.get("Thumbnail JPEGInterchangeFormatLength")
+    if offset is None or length is None:
+        return None
+    # The offsets count from the TIFF header: the start of a TIFF based
+    # RAW file, or right after the Exif marker of a JPEG
+    f.seek(0)
+    head = f.read(EXIF_SEARCH_LIMIT)
+    if head[:2] in (b"II", b"MM"):
+        base = 0
+    else:
+        base = head.find(b"Exif\x00\x00")
+        if base == -1:
+            return None
+        base += 6
+    f.seek(base + offset.values[0])
+    return f.read(length.values[0])
+
+def load_image(filename):
+    """Open the picture of a file as small as possible. The EXIF thumbnail
+    is used when there is one, so RAW files are never decoded, otherwise
+    the JPEG decoder is asked to scale down while decoding.
+    """
+    import exifread
+    have_pillow()
+    with open(filename, "rb") as f:
+        # Orientation comes before the EXIF sub-IFD in IFD0, which is then
+        # not parsed at all; the thumbnail IFD still is
+        tags = exifread.process_file(f, details=False, stop_tag="Orientation")
+        thumbnail = _read_thumbnail(f, tags)
+    orientation = tags.get("Image Orientation")
+    orientation = orientation.values[0] if orientation is not None else 1
+    if thumbnail:
+        try:
+            image = Image.open(io.BytesIO(thumbnail))
+            image.load()
+            return _orient(image, orientation)
+        except OSError:
+            pass
+    if path.splitext(filename)[1].lower() in ('.cr2', '.nef'):
+        # Not worth decoding a whole RAW file
+        return None
+    image = Image.open(filename)
+    image.draft("L", (HASH_SIZE * PHASH_SCALE, HASH_SIZE * PHASH_SCALE))
+    image.load()
+    return _orient(image, orientation)
+
+def image_hash(filename, algorithm="dhash"):
+    """Return the 64-bit perceptual hash of an image file, or None when
+    there is no picture to hash in it
+    """
+    try:
+        image = load_image(filename)
+    except (OSError, ValueError, SyntaxError):
+        return None
+    if image is None:
+        return None
+    return ALGORITHMS[algorithm](image)
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes with the Hamming distance.
+
+    Every child hangs off its parent by its distance to it, so a search
+    within max_distance of a hash only descends into the children whose
+    distance can still be in range, instead of comparing against every
+    hash.
+    """
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        node = [value, item, {}]
+        if self.root is None:
+            self.root = node
+            return
+        parent = self.root
+        while True:
+            distance = hamming(value, parent[0])
+            child = parent[2].get(distance)
+            if child is None:
+                parent[2][distance] = node
+                return
+            parent = child
+
+    def search(self, value, max_distance):
+        """Return (distance, item) for every hash within max_distance"""
+        result = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                result.append((distance, node[1]))
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return result
+
+
+class HashCache:
+    """Perceptual hashes of the files under root, kept on disk next to them
+    and reused as long as a file keeps the same size and mtime. Files that
+    could not be hashed are remembered too, so they are not opened again.
+    """
+    def __init__(self, root, algorithm="dhash"):
+        self.root = path.abspath(root)
+        self.algorithm = algorithm
+        self.pending = 0
+        self.conn = sqlite3.connect(path.join(self.root, CACHE_FILENAME))
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS hashes ("
+                              "path TEXT NOT NULL, algorithm TEXT NOT NULL, size INTEGER NOT NULL, "
+                              "mtime INTEGER NOT NULL, hash TEXT, PRIMARY KEY (path, algorithm))")
+
+    def _key(self, filename):
+        return path.relpath(path.abspath(filename), self.root)
+
+    def lookup(self, filename, st):
+        """Return (found, hash) for a file with the given stat result"""
+        row = self.conn.execute("SELECT size, mtime, hash FROM hashes WHERE path = ? AND algorithm = ?",
+                                (self._key(filename), self.algorithm)).fetchone()
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns:
+            return False, None
+        return True, int(row[2], 16) if row[2] is not None else None
+
+    def store(self, filename, st, value):
+        self.conn.execute("INSERT OR REPLACE INTO hashes (path, algorithm, size, mtime, hash) VALUES (?, ?, ?, ?, ?)",
+                          (self._key(filename), self.algorithm, st.st_size, st.st_mtime_ns,
+                           "{:016x}".format(value) if value is not None else None))
+        self.pending += 1
+        if self.pending >= CACHE_COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+def _group(filename, parent):
+    root = filename
+    while parent[root] != root:
+        root = parent[root]
+    return root
+
+def find_similar(filenames, cache, executor, max_distance=DEFAULT_MAX_DISTANCE):
+    """Return the groups of images that look alike as lists of
+    (filename, hash). Two images are in the same group when there is a
+    chain of images between them no more than max_distance bits apart.
+    The RAW and the JPEG of the same shot (same directory and name) are
+    not near-duplicates of each other. Hashes missing from the cache are
+    computed on the executor.
+    """
+    hashes = {}
+    missing = []
+    for filename in filenames:
+        st = os.stat(filename)
+        found, value = cache.lookup(filename, st)
+        if found:
+            hashes[filename] = value
+        else:
+            missing.append((filename, st))
+    computed = executor.map(lambda filename: image_hash(filename, cache.algorithm),
+                            [filename for filename, st in missing])
+    for (filename, st), value in zip(missing, computed):
+        cache.store(filename, st, value)
+        hashes[filename] = value
+    cache.commit()
+
+    tree = BKTree()
+    parent = {}
+    for filename in filenames:
+        value = hashes[filename]
+        if value is None:
+            continue
+        parent[filename] = filename
+        for distance, other in tree.search(value, max_distance):
+            if path.splitext(other)[0] == path.splitext(filename)[0]:
+                continue
+            # Union of the two groups
+            parent[_group(other, parent)] = _group(filename, parent)
+        tree.add(value, filename)
+
+    groups = {}
+    for filename in parent:
+        groups.setdefault(_group(filename, parent), []).append((filename, hashes[filename]))
+    return [group for group in groups.values() if len(group) > 1]
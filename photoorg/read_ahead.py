@@ -0,0 +1,147 @@
+# Tested with Python 3.8 or above
+
+import os
+import threading
+from collections import deque
+
+# How many files ahead of the planner to read, and how many bytes the
+# read-ahead may hold at most
+READ_AHEAD_FILES = 8
+READ_AHEAD_BYTES = 16 * 1024 * 1024
+# Reads in flight at the same time, SD card readers and SMB shares only
+# reach their bandwidth with several requests outstanding
+READ_AHEAD_THREADS = 4
+# How much of the head of a file is read ahead. The EXIF of a JPEG, and the
+# IFDs of a NEF or CR2, sit in the first few KiB; reads past this go to the
+# file as usual.
+READ_AHEAD_REGION = 64 * 1024
+# Size of the buffer files are hashed and copied through. A multiple of
+# the page size, so every read starts on a page boundary.
+BLOCK_SIZE = 1024 * 1024
+
+_buffers = threading.local()
+
+def block_buffer():
+    """The BLOCK_SIZE bytearray reused by every hash and copy on this thread"""
+    buf = getattr(_buffers, "buf", None)
+    if buf is None:
+        buf = _buffers.buf = bytearray(BLOCK_SIZE)
+    return buf
+
+def advise_sequential(fd):
+    """Tell the kernel the whole file is about to be read in order, so it
+    reads ahead further than it would by default
+    """
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+def read_head(filename, size):
+    """Return the first size bytes of filename and the size of the file,
+    in a single request where the platform has pread
+    """
+    fd = os.open(filename, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        file_size = os.fstat(fd).st_size
+        if hasattr(os, "pread"):
+            return os.pread(fd, size, 0), file_size
+        return os.read(fd, size), file_size
+    finally:
+        os.close(fd)
+
+
+class PrefetchedFile:
+    """Read-only file object over a file whose head was read ahead. Reads
+    within the head are served from memory, the file itself is only
+    opened when a read goes past it.
+    """
+    def __init__(self, filename, head, size):
+        self.filename = filename
+        self.head = head
+        self.size = size
+        self.pos = 0
+        self.f = None
+        self.closed = False
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = max(self.size - self.pos, 0)
+        end = self.pos + size
+        if end <= len(self.head) or len(self.head) == self.size:
+            data = self.head[self.pos:end]
+        else:
+            if self.f is None:
+                self.f = open(self.filename, 'rb')
+            self.f.seek(self.pos)
+            data = self.f.read(size)
+        self.pos += len(data)
+        return data
+
+    def seek(self, offset, whence=0):
+        if whence == os.SEEK_CUR:
+            offset += self.pos
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self.pos = offset
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+        self.closed = True
+
+
+class Prefetcher:
+    """Keeps the source busy while the planner works: the metadata region
+    of the next files is read on a few I/O threads, so by the time a file
+    is parsed its head is already in memory instead of costing a round
+    trip for every small read exifread makes. At most max_files files and
+    max_bytes bytes are read ahead, which bounds the memory it takes.
+    """
+    def __init__(self, region, max_files=READ_AHEAD_FILES, max_bytes=READ_AHEAD_BYTES, threads=READ_AHEAD_THREADS):
+        self.region = region
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.threads = threads
+
+    def iterate(self, items, filename_of):
+        """Yield (item, head) for every item, in order. head is the
+        (filename, data, size) read ahead for filename_of(item), or None
+        when filename_of returned None or the read failed.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        items = iter(items)
+        ahead = deque()
+        in_flight_bytes = 0
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            exhausted = False
+            while True:
+                # Always keep the next item, whatever the limits
+                while not exhausted and (not ahead or (len(ahead) < self.max_files and
+                                                       in_flight_bytes + self.region <= self.max_bytes)):
+                    item = next(items, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    filename = filename_of(item)
+                    future = executor.submit(read_head, filename, self.region) if filename is not None else None
+                    ahead.append((item, filename, future))
+                    if future is not None:
+                        in_flight_bytes += self.region
+                if not ahead:
+                    return
+                item, filename, future = ahead.popleft()
+                head = None
+                if future is not None:
+                    in_flight_bytes -= self.region
+                    try:
+                        data, size = future.result()
+                        head = (filename, data, size)
+                    except OSError:
+                        pass
+                yield item, head
@@ -0,0 +1,111 @@
+# Tested with Python 3.8 or above
+
+import json
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+@contextmanager
+def timed(timings, phase):
+    """Add the time spent in the block to timings[phase]. Used where the
+    work happens in a worker process and timings travel back with the result.
+    """
+    tic = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - tic
+
+# Durations are kept as a histogram of buckets this much wider than the
+# previous one, so percentiles are within 2% of the exact value however
+# long a --watch daemon runs
+BUCKET_RATIO = 1.04
+_LOG_BUCKET_RATIO = math.log(BUCKET_RATIO)
+
+
+class Durations:
+    """Running count, total and histogram of the durations of one phase"""
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = defaultdict(int)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        # Bucket None holds durations too short for the clock to see
+        bucket = math.floor(math.log(seconds) / _LOG_BUCKET_RATIO) if seconds > 0 else None
+        self.buckets[bucket] += 1
+
+    def percentile(self, pct):
+        """Nearest-rank percentile, to within the width of a bucket"""
+        if not self.count:
+            return 0.0
+        rank = min(max(math.ceil(pct / 100.0 * self.count), 1), self.count)
+        seen = self.buckets.get(None, 0)
+        if seen >= rank:
+            return 0.0
+        for bucket in sorted(bucket for bucket in self.buckets if bucket is not None):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                # The middle of the bucket, never outside what was seen
+                value = BUCKET_RATIO ** (bucket + 0.5)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+
+class RunStats:
+    """Collects how long each phase of a run took and how often things
+    happened, and prints a summary with p50/p95/p99 latencies at the end.
+    Per-file events are written as JSON lines when an events file is given.
+    """
+    def __init__(self, events_path=None):
+        self.durations = defaultdict(Durations)
+        self.counters = defaultdict(int)
+        self.events = open(events_path, "a") if events_path else None
+        self.tic = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        tic = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name].add(time.perf_counter() - tic)
+
+    def add_timings(self, timings):
+        """Record the phases timed with timed() for one file"""
+        for name, seconds in timings.items():
+            self.durations[name].add(seconds)
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def event(self, **fields):
+        if self.events is not None:
+            fields["time"] = time.time()
+            self.events.write(json.dumps(fields) + "\n")
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.tic
+        lines = [f"Run finished in {elapsed:0.3f}sec"]
+        for name in sorted(self.counters):
+            lines.append(f"  {name:<24} {self.counters[name]}")
+        if self.durations:
+            lines.append("  {:<14} {:>8} {:>10} {:>10} {:>10} {:>10}".format(
+                "phase", "count", "total(s)", "p50(ms)", "p95(ms)", "p99(ms)"))
+        for name in sorted(self.durations):
+            durations = self.durations[name]
+            lines.append("  {:<14} {:>8} {:>10.3f} {:>10.2f} {:>10.2f} {:>10.2f}".format(
+                name, durations.count, durations.total, durations.percentile(50) * 1000,
+                durations.percentile(95) * 1000, durations.percentile(99) * 1000))
+        return "\n".join(lines)
+
+    def close(self):
+        if self.events is not None:
+            self.events.close()
@@ -0,0 +1,103 @@
+# Tested with Python 3.8 or above
+
+import os
+from os import path
+import hashlib
+import sqlite3
+from . import zip_source
+
+JOURNAL_FILENAME = ".photo-org-journal.sqlite"
+# Where the journals of read-only sources go, under the target library
+FALLBACK_DIRNAME = ".photo-org-journals"
+# Outcomes are written in batches, a crash loses at most this many of them
+# and those files simply get processed again
+JOURNAL_COMMIT_EVERY = 500
+
+MOVED = "moved"
+TRASHED = "trashed"
+UNSUPPORTED = "unsupported"
+FAILED = "failed"
+# A sidecar whose photo is not in the library yet, looked at again by
+# every run until it is
+UNPLACED = "unplaced"
+
+def is_journal_file(filename):
+    return path.basename(filename).startswith(JOURNAL_FILENAME)
+
+def fallback_filename(fallback_dir, root):
+    """Journal of a source root that can't be written to, kept under
+    fallback_dir and named after the root so every source gets its own
+    """
+    digest = hashlib.sha256(path.abspath(root).encode("utf-8", "surrogateescape")).hexdigest()[:16]
+    return path.join(fallback_dir, FALLBACK_DIRNAME, "{}-{}.sqlite".format(path.basename(root) or "root", digest))
+
+
+class SourceJournal:
+    """Remembers what happened to every source file photo-org looked at.
+
+    Entries are keyed by the source path and carry the size, mtime and
+    inode the file had, so a re-run can skip every file whose outcome
+    would not change: unsupported files, files that failed (unless asked
+    to retry them), and anything still sitting there untouched.
+    Zip members use the archive's path, the member's size and date, and
+    the member's CRC in place of the inode.
+
+    The journal sits at the root of the source. When that is read-only
+    (a card, a mounted archive share) it goes under fallback_dir instead.
+    """
+    def __init__(self, srcPath, fallback_dir=None):
+        # A zip source gets its journal in the directory holding it
+        self.root = path.abspath(srcPath if path.isdir(srcPath) else path.dirname(srcPath))
+        self.filename = path.join(self.root, JOURNAL_FILENAME)
+        if fallback_dir is not None and not os.access(self.root, os.W_OK):
+            self.filename = fallback_filename(fallback_dir, self.root)
+            os.makedirs(path.dirname(self.filename), exist_ok=True)
+        self.conn = sqlite3.connect(self.filename)
+        self.pending = 0
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS journal ("
+                              "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime INTEGER NOT NULL, "
+                              "inode INTEGER NOT NULL, outcome TEXT NOT NULL, target TEXT, detail TEXT)")
+
+    def identify(self, filename, archive_path=None):
+        """Return the (key, size, mtime, inode) identity of a source file"""
+        if archive_path is not None:
+            key = path.relpath(path.abspath(archive_path), self.root) + ":" + filename
+            info = zip_source.get_archive(archive_path).getinfo(filename)
+            return key, info.file_size, int(zip_source.member_mtime(archive_path, filename)), info.CRC
+        st = os.stat(filename)
+        return path.relpath(path.abspath(filename), self.root), st.st_size, st.st_mtime_ns, st.st_ino
+
+    def should_skip(self, identity, retry_failed=False):
+        """True when the file was already handled and has not changed since"""
+        key, size, mtime, inode = identity
+        row = self.conn.execute("SELECT size, mtime, inode, outcome FROM journal WHERE path = ?", (key,)).fetchone()
+        if row is None or row[0:3] != (size, mtime, inode) or row[3] == UNPLACED:
+            return False
+        return not (retry_failed and row[3] == FAILED)
+
+    def recorded_under(self, prefix):
+        """Return (path, outcome, target) for every entry whose path starts
+        with prefix
+        """
+        return self.conn.execute("SELECT path, outcome, target FROM journal WHERE path >= ? AND path < ?",
+                                 (prefix, prefix + "\U0010ffff")).fetchall()
+
+    def record(self, identity, outcome, target=None, detail=None):
+        """Record the outcome of a file, identity is what identify() returned
+        for it before it was moved
+        """
+        key, size, mtime, inode = identity
+        self.conn.execute("INSERT OR REPLACE INTO journal (path, size, mtime, inode, outcome, target, detail) "
+                          "VALUES (?, ?, ?, ?, ?, ?, ?)", (key, size, mtime, inode, outcome, target, detail))
+        self.pending += 1
+        if self.pending >= JOURNAL_COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
@@ -0,0 +1,218 @@
+import sys
+import os
+import json
+import zlib
+import argparse
+import threading
+from os import path
+import shutil
+import zipfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import walker
+
+HELP_MESSAGE = "%(prog)s <source-path> [--jobs N]"
+# Size of the reads used when checking the CRC of an extracted file
+CRC_BLOCK_SIZE = 1024 * 1024
+# Characters Windows does not allow in a file name, replaced like
+# zipfile.extract does
+WINDOWS_ILLEGAL = str.maketrans(':<>|"?*', '_______')
+
+def crc32_file(filename):
+    crc = 0
+    with open(filename, 'rb') as f:
+        for byte_block in iter(lambda: f.read(CRC_BLOCK_SIZE), b""):
+            crc = zlib.crc32(byte_block, crc)
+    return crc
+
+def member_target(filename_prefix, info):
+    """Path a member is extracted to under filename_prefix. Like
+    zipfile.extract, drive letters, absolute paths and '..' are dropped so
+    nothing lands outside of it. None when nothing is left of the name.
+    """
+    arcname = info.filename.replace('/', os.sep)
+    if os.altsep:
+        arcname = arcname.replace(os.altsep, os.sep)
+    arcname = path.splitdrive(arcname)[1]
+    parts = [part for part in arcname.split(os.sep) if part not in ('', os.curdir, os.pardir)]
+    if os.sep == '\\':
+        parts = [part.translate(WINDOWS_ILLEGAL).rstrip('.') for part in parts]
+        parts = [part for part in parts if part]
+    if not parts:
+        return None
+    return path.join(filename_prefix, *parts)
+
+
+class ArchiveJob:
+    """Extraction state of one zip archive.
+
+    Completed members are appended to a manifest next to the archive
+    (files.zip -> files.manifest.jsonl) with their size and CRC, so an
+    interrupted extraction resumes where it stopped. Every thread reads
+    the archive through a ZipFile of its own, they are all closed once the
+    last member is done.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.filename_prefix, extension = path.splitext(filename)
+        self.manifest_path = self.filename_prefix + ".manifest.jsonl"
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.zip_refs = []
+        self.done = self._load_manifest()
+        with zipfile.ZipFile(filename, 'r') as zip_ref:
+            self.members = [info for info in zip_ref.infolist()
+                            if member_target(self.filename_prefix, info) is not None]
+        self.pending = len(self.members)
+        self.members_extracted = 0
+        self.bytes_extracted = 0
+        self.tic = None
+        self.toc = None
+
+    def _load_manifest(self):
+        done = {}
+        if path.isfile(self.manifest_path):
+            with open(self.manifest_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Last line cut short by an interruption
+                        continue
+                    done[entry["name"]] = entry
+        return done
+
+    def _zip_ref(self):
+        # One handle per thread so members can be read concurrently
+        zip_ref = getattr(self.local, "zip_ref", None)
+        if zip_ref is None:
+            zip_ref = zipfile.ZipFile(self.filename, 'r')
+            self.local.zip_ref = zip_ref
+            with self.lock:
+                self.zip_refs.append(zip_ref)
+        return zip_ref
+
+    def close(self):
+        with self.lock:
+            zip_refs, self.zip_refs = self.zip_refs, []
+        for zip_ref in zip_refs:
+            zip_ref.close()
+
+    def _is_done(self, info, target):
+        if info.is_dir():
+            return path.isdir(target)
+        if not path.isfile(target) or path.getsize(target) != info.file_size:
+            return False
+        entry = self.done.get(info.filename)
+        if entry is not None:
+            return entry["size"] == info.file_size and entry["crc"] == info.CRC
+        # Extracted before the manifest existed, or the run stopped before
+        # it was recorded: only trust it if the CRC matches
+        if crc32_file(target) != info.CRC:
+            return False
+        self._record(info)
+        return True
+
+    def _record(self, info):
+        with self.lock:
+            self.done[info.filename] = {"name": info.filename, "size": info.file_size, "crc": info.CRC}
+            with open(self.manifest_path, "a") as f:
+                f.write(json.dumps(self.done[info.filename]) + "\n")
+
+    def extract_member(self, info):
+        """Extract one member unless it is already done, returns True when
+        this was the last member of the archive
+        """
+        with self.lock:
+            if self.tic is None:
+                self.tic = time.perf_counter()
+        try:
+            target = member_target(self.filename_prefix, info)
+            if not self._is_done(info, target):
+                self._extract(info, target)
+                with self.lock:
+                    self.members_extracted += 1
+                    self.bytes_extracted += info.file_size
+        finally:
+            with self.lock:
+                self.pending -= 1
+                last = self.pending == 0
+                if last:
+                    self.toc = time.perf_counter()
+            if last:
+                # No other thread is reading the archive anymore
+                self.close()
+        return last
+
+    def _extract(self, info, target):
+        # Other threads may be creating the same sub-directory
+        if info.is_dir():
+            os.makedirs(target, exist_ok=True)
+            return
+        os.makedirs(path.dirname(target), exist_ok=True)
+        # zipfile checks the CRC of the data while it is read
+        with self._zip_ref().open(info) as source, open(target, 'wb') as out:
+            shutil.copyfileobj(source, out, CRC_BLOCK_SIZE)
+        self._record(info)
+
+    def report(self):
+        if self.members_extracted == 0:
+            print("  --> Skipping {} as it seems it is already unzipped in this directory".format(self.filename), flush=True)
+            return
+        elapsed = self.toc - self.tic
+        mb_per_sec = self.bytes_extracted / (1024 * 1024) / elapsed if elapsed > 0 else 0
+        print("  --> Done extracting {} to {}".format(self.filename, self.filename_prefix), flush=True)
+        print(f"  ({elapsed:0.4f}sec) --> ({elapsed/60:0.4f}min) --> ({mb_per_sec:0.2f}MB/s)", flush=True)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog=argv[0], usage=HELP_MESSAGE)
+    parser.add_argument("source")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="number of members extracted at the same time, across all archives")
+    args = parser.parse_args(argv[1:])
+    srcPath = args.source
+    print(f"Source Path: {srcPath}\n")
+
+    # We loop through all files in the directory given to us.
+    # We do NOT recursively go through the directory
+    jobs = []
+    for filename in walker.Walker(extensions=(".zip",), recursive=False).files(srcPath):
+        # The filename will be the full path like so:
+        #
+        # filename: G:\test\files.zip
+        #
+        # However, the filename_prefix and extension will be:
+        #
+        # filename_prefix: G:\test\files
+        # extension      : .zip
+        #
+        # The idea is, for those files with .zip extensions, we'll extract
+        # every member and place it in the "filename_prefix" directory.
+        # Members listed in the manifest, or whose extracted copy has the
+        # right CRC, are already done and left alone, so a re-run resumes
+        # an interrupted extraction.
+        filename_prefix, extension = path.splitext(filename)
+        if extension == ".zip":
+            print("filename: {}, prefix: {}, extension: {}".format(filename, filename_prefix, extension), flush=True)
+            jobs.append(ArchiveJob(filename))
+
+    tic = time.perf_counter()
+    total_bytes = 0
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [(job, executor.submit(job.extract_member, info)) for job in jobs for info in job.members]
+        for job in jobs:
+            if not job.members:
+                print("  --> Skipping {} as it has no files".format(job.filename), flush=True)
+        for job, future in futures:
+            if future.result():
+                job.report()
+                total_bytes += job.bytes_extracted
+    toc = time.perf_counter()
+    mb_per_sec = total_bytes / (1024 * 1024) / (toc - tic) if toc > tic else 0
+    print(f"\nExtracted {total_bytes} bytes from {len(jobs)} archives in {toc - tic:0.4f}sec ({mb_per_sec:0.2f}MB/s)", flush=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
+    sys.exit(0)
@@ -0,0 +1,101 @@
+# Tested with Python 3.8 or above
+
+import os
+from os import path
+from fnmatch import fnmatch
+
+def _matches(name, relpath, patterns):
+    # A pattern with a separator is matched against the path relative to
+    # the root, otherwise against the bare name
+    for pattern in patterns:
+        if fnmatch(relpath if ('/' in pattern or os.sep in pattern) else name, pattern):
+            return True
+    return False
+
+
+class Walker:
+    """Recursive directory walker built on os.scandir.
+
+    Entries are filtered on their name alone (extension, include/exclude
+    globs, hidden files) before anything is stat'ed, and directories are
+    told apart with the d_type scandir already returned. Directories
+    matching a prune glob are not descended into. Like glob('**/*') it
+    skips hidden entries, but the order differs: all the files of a
+    directory are yielded before any of its subdirectories is entered
+    (glob descends into a subdirectory as soon as it lists it), so that a
+    directory's files arrive together. When two files collide on a target
+    name, which one gets the -N suffix can therefore differ from versions
+    that walked with glob.
+    """
+    def __init__(self, extensions=None, include=(), exclude=(), prune=(), recursive=True, threads=1):
+        self.extensions = set(extensions) if extensions is not None else None
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self.prune = tuple(prune)
+        self.recursive = recursive
+        self.threads = threads
+
+    def _wanted(self, name, relpath):
+        if self.extensions is not None and path.splitext(name)[1] not in self.extensions:
+            return False
+        if self.include and not _matches(name, relpath, self.include):
+            return False
+        return not _matches(name, relpath, self.exclude)
+
+    def wants(self, root, filename):
+        """True when walking root would yield filename, used to filter the
+        files reported one by one in --watch mode
+        """
+        relpath = path.relpath(filename, root)
+        parts = relpath.split(os.sep)
+        if parts[0] == os.pardir or any(part.startswith('.') for part in parts):
+            return False
+        if len(parts) > 1 and not self.recursive:
+            return False
+        for depth in range(1, len(parts)):
+            if _matches(parts[depth - 1], os.sep.join(parts[:depth]), self.prune):
+                return False
+        return self._wanted(parts[-1], relpath)
+
+    def _scan(self, root, dirpath):
+        """Return (files, subdirs) of one directory as DirEntry lists"""
+        files, subdirs = [], []
+        with os.scandir(dirpath) as it:
+            for entry in it:
+                if entry.name.startswith('.'):
+                    continue
+                relpath = path.relpath(entry.path, root)
+                if entry.is_dir():
+                    if self.recursive and not _matches(entry.name, relpath, self.prune):
+                        subdirs.append(entry)
+                elif self._wanted(entry.name, relpath):
+                    files.append(entry)
+        return files, subdirs
+
+    def _walk(self, root, dirpath):
+        files, subdirs = self._scan(root, dirpath)
+        yield from files
+        for subdir in subdirs:
+            yield from self._walk(root, subdir.path)
+
+    def entries(self, root):
+        """Yield a DirEntry for every wanted file under root. With more than
+        one thread the top-level directories are scanned concurrently, which
+        hides the per-request latency of network mounts; the order of the
+        results stays the same.
+        """
+        if self.threads <= 1:
+            yield from self._walk(root, root)
+            return
+        files, subdirs = self._scan(root, root)
+        yield from files
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            futures = [executor.submit(lambda d: list(self._walk(root, d)), subdir.path) for subdir in subdirs]
+            for future in futures:
+                yield from future.result()
+
+    def files(self, root):
+        """Yield the path of every wanted file under root"""
+        for entry in self.entries(root):
+            yield entry.path
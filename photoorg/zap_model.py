@@ -0,0 +1,151 @@
+# Tested with Python 3.8 or above
+
+import sys
+import re
+import argparse
+from os import path
+from concurrent.futures import ThreadPoolExecutor
+from . import exiftool_client
+from . import walker
+
+HELP_MESSAGE = "%(prog)s <path> {NIKONZ6|NIKONZ6_2} [--nocheck] [--chunk-size N] [--jobs N]"
+# Number of files handed to a single ExifTool request
+DEFAULT_CHUNK_SIZE = 500
+
+camera_model_map = { "NIKONZ6_2": "NIKON Z 6_2", 
+                     "NIKONZ6"  : "NIKON Z 6"
+                   }
+
+def exif_matches_model(filename, camera_model):
+    # Use exiftool to see what the current camera model is
+    #print(f"Checking {filename} matches {camera_model}")
+    exif_tags = exiftool_client.get_pool().get_tags(filename, ('-Model',))
+    model_exif = str(exif_tags.get('Model', '')).strip()
+    print(f"EXIF MODEL: {model_exif}, looking to update to {camera_model}")
+    return model_exif == camera_model
+
+def exif_camera_model_update(filename, camera_model):
+    # Use exiftool to replace the model as provided by overriding the
+    # current file as well
+    failed_update = False
+    stdout, stderr = exiftool_client.get_pool().execute('-overwrite_original',
+                        '-model={}'.format(camera_model), filename)
+    for line in stdout.splitlines():
+        if line.strip() != '1 image files updated':
+            failed_update = True
+            print(line)
+        else:
+            break
+    if failed_update:
+        if stderr.strip():
+            print(stderr.strip())
+        raise ProcessLookupError(f"Unable to process {filename} with model {camera_model}")
+
+def exif_camera_model_update_batch(filenames, camera_model, check_model):
+    """Update a whole chunk of files with a single ExifTool request. When
+    check_model is set ExifTool itself skips the files already carrying
+    the model, in the same pass. Returns (updated, unchanged, failed)
+    where failed lists the files ExifTool reported an error for.
+    """
+    args = ['-overwrite_original']
+    if check_model:
+        args += ['-if', '$Model ne "{}"'.format(camera_model)]
+    args += ['-model={}'.format(camera_model)] + list(filenames)
+    chunk = set(filenames)
+    failed = []
+    def on_stderr(line):
+        # Errors end with " - <filename>". A chunk can produce a lot of
+        # warnings, they are looked at as they come instead of being kept.
+        line = line.rstrip("\n")
+        if not line.startswith("Error"):
+            return
+        print(line)
+        start = line.find(" - ")
+        while start != -1:
+            if line[start + 3:] in chunk:
+                failed.append(line[start + 3:])
+                return
+            start = line.find(" - ", start + 1)
+    stdout, _ = exiftool_client.get_pool().execute(*args, on_stderr=on_stderr)
+    counts = {}
+    for line in stdout.splitlines():
+        # The summary looks like "    3 image files updated",
+        # "    2 files failed condition", "    1 files weren't updated due to errors"
+        m = re.match(r"\s*(\d+) (.*)$", line)
+        if m is not None:
+            counts[m.group(2)] = int(m.group(1))
+    return counts.get('image files updated', 0), counts.get('files failed condition', 0), failed
+
+def chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def walk_nef_files(thePath):
+    return walker.Walker(extensions=(".NEF",)).files(thePath)
+
+def zap_per_file(thePath, camera_model, nocheck_flag):
+    for filename in walk_nef_files(thePath):
+        print(f"filename: {filename}, with extension: .NEF")
+        # Find out whether it is already set to the model
+        # we're intending to set it to
+        if nocheck_flag or not exif_matches_model(filename, camera_model):
+            print(f"UPDATING file: {filename} with model '{camera_model}'")
+            exif_camera_model_update(filename, camera_model)
+
+def zap_batched(thePath, camera_model, nocheck_flag, chunk_size, jobs):
+    exiftool_client.get_pool(jobs)
+    total_updated = total_unchanged = 0
+    all_failed = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(exif_camera_model_update_batch, chunk, camera_model, not nocheck_flag)
+                   for chunk in chunks(walk_nef_files(thePath), chunk_size)]
+        for future in futures:
+            updated, unchanged, failed = future.result()
+            print(f"UPDATED {updated} files with model '{camera_model}', {unchanged} already had it, {len(failed)} failed", flush=True)
+            total_updated += updated
+            total_unchanged += unchanged
+            all_failed += failed
+    print(f"\nDone: {total_updated} updated, {total_unchanged} unchanged, {len(all_failed)} failed")
+    for filename in all_failed:
+        print(f"Unable to process {filename} with model {camera_model}")
+    if all_failed:
+        raise ProcessLookupError(f"Unable to process {len(all_failed)} files with model {camera_model}")
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog=argv[0], usage=HELP_MESSAGE)
+    parser.add_argument("path")
+    parser.add_argument("model")
+    parser.add_argument("--nocheck", action="store_true",
+                        help="update without checking the model of the existing file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="files per ExifTool request, 1 checks and updates one file at a time")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="number of chunks processed at the same time")
+    args = parser.parse_args(argv[1:])
+    thePath = args.path
+    camera_model = camera_model_map.get(args.model)
+    nocheck_flag = args.nocheck
+    if nocheck_flag:
+        print("No check flag detected - will simply update without checking model of existing file")
+    if camera_model is None:
+        print(f"Camera model {args.model} not yet supported!")
+        print(f"{parser.format_usage().strip()}  num args = {len(argv)}")
+        sys.exit(1)
+    print(f"Path to zap with model '{camera_model}': {thePath}\n")
+    if not path.isdir(thePath):
+        print(f"ERROR: Path must be a valid directory")
+        sys.exit(1)
+    if args.chunk_size <= 1:
+        zap_per_file(thePath, camera_model, nocheck_flag)
+    else:
+        zap_batched(thePath, camera_model, nocheck_flag, args.chunk_size, args.jobs)
+
+if __name__ == "__main__":
+    main(sys.argv)
+    sys.exit(0)
@@ -0,0 +1,115 @@
+# Tested with Python 3.8 or above
+
+import os
+from os import path
+import time
+import functools
+import threading
+from . import fast_move
+
+# Size of the chunks streamed out of an archive member
+COPY_BLOCK_SIZE = 1024 * 1024
+
+# Every process keeps its own open ZipFile per archive, a ZipFile can't be
+# handed over to the worker processes used by --jobs
+_archives = {}
+_archives_lock = threading.Lock()
+
+def _forget_archives():
+    # A forked worker would share the file offset of the ZipFiles of its
+    # parent, and the reads of one process would corrupt those of another
+    global _archives_lock
+    _archives.clear()
+    _archives_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_archives)
+
+def is_zip(filename):
+    return path.splitext(filename)[1].lower() == ".zip"
+
+@functools.lru_cache(maxsize=None)
+def file_mode():
+    """Mode of a file created with open(), mkstemp creates them 0600"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+def get_archive(archive_path):
+    with _archives_lock:
+        archive = _archives.get(archive_path)
+        if archive is None:
+            import zipfile
+            archive = zipfile.ZipFile(archive_path, 'r')
+            _archives[archive_path] = archive
+        return archive
+
+def list_members(archive_path):
+    """Yield the name of every file (not directory) stored in the archive"""
+    for info in get_archive(archive_path).infolist():
+        if not info.is_dir():
+            yield info.filename
+
+def open_member(archive_path, member):
+    return get_archive(archive_path).open(member, 'r')
+
+def member_size(archive_path, member):
+    return get_archive(archive_path).getinfo(member).file_size
+
+def member_mtime(archive_path, member):
+    return time.mktime(get_archive(archive_path).getinfo(member).date_time + (0, 0, -1))
+
+def hash_member(archive_path, member):
+    """SHA-256 of the uncompressed member"""
+    import hashlib
+    sha256_hash = hashlib.sha256()
+    with open_member(archive_path, member) as f:
+        for byte_block in iter(lambda: f.read(COPY_BLOCK_SIZE), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+def copy_member(archive_path, member, target):
+    """Write the member to target, keeping its date from the archive, and
+    return its SHA-256 computed on the way. The data goes to a hidden
+    temporary file next to target first, which only takes the target name
+    once it is complete, so a failed copy never leaves a truncated photo
+    in the library. An existing target raises FileExistsError.
+    """
+    import hashlib
+    import tempfile
+    sha256_hash = hashlib.sha256()
+    fd, partial = tempfile.mkstemp(prefix=".photo-org-", suffix=".part", dir=path.dirname(target))
+    try:
+        with os.fdopen(fd, 'wb') as out, open_member(archive_path, member) as f:
+            for byte_block in iter(lambda: f.read(COPY_BLOCK_SIZE), b""):
+                sha256_hash.update(byte_block)
+                out.write(byte_block)
+        mtime = member_mtime(archive_path, member)
+        os.utime(partial, (mtime, mtime))
+        os.chmod(partial, file_mode())
+        fast_move.rename_exclusive(partial, target)
+    except BaseException:
+        if path.isfile(partial):
+            os.remove(partial)
+        raise
+    return sha256_hash.hexdigest()
+
+def spool_member(archive_path, member, directory=None):
+    """Extract the member to a hidden temporary file in directory (the
+    system's temporary directory by default) for tools that need a real
+    path (ExifTool). The file keeps the member's extension and date, and
+    gets the usual file mode so it can be moved into the library as is.
+    """
+    import shutil
+    import tempfile
+    fd, spooled = tempfile.mkstemp(prefix=".photo-org-spool-", suffix=path.splitext(member)[1], dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as out, open_member(archive_path, member) as f:
+            shutil.copyfileobj(f, out, COPY_BLOCK_SIZE)
+        mtime = member_mtime(archive_path, member)
+        os.utime(spooled, (mtime, mtime))
+        os.chmod(spooled, file_mode())
+    except BaseException:
+        os.remove(spooled)
+        raise
+    return spooled
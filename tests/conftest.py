@@ -0,0 +1,65 @@
+import os
+import random
+import zipfile
+
+import pytest
+
+from benchmarks import corpus, run
+from photoorg import exiftool_client, library_index, organize, run_stats, source_journal
+
+DATE_TIME = "2021:03:04 05:06:07"
+DATE_DIR = os.path.join("2021", "03", "04")
+PREFIX = "20210304-050607-nikon-z-6-"
+
+
+def make_zip(filename, members):
+    """Write a zip archive of the given {name: data} members"""
+    with zipfile.ZipFile(filename, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(zipfile.ZipInfo(name, date_time=(2020, 1, 2, 3, 4, 6)), data)
+    return str(filename)
+
+
+@pytest.fixture
+def jpeg():
+    """Return a function writing a JPEG with EXIF to a path, different
+    seeds give different image data
+    """
+    def write(filename, seed=0, size=4096, date_time=DATE_TIME, model="NIKON Z 6"):
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        data = corpus.jpeg_bytes(random.Random(seed), size, model, date_time)
+        with open(filename, "wb") as f:
+            f.write(data)
+        return data
+    return write
+
+
+@pytest.fixture
+def exiftool(tmp_path_factory, monkeypatch):
+    """Make the ExifTool client run benchmarks/fake_exiftool.py, with a
+    pool of its own, and return the path of the stand-in
+    """
+    wrapper = run.write_exiftool_wrapper(str(tmp_path_factory.mktemp("exiftool")))
+    monkeypatch.setattr(exiftool_client, "EXIFTOOL_PATH", wrapper)
+    monkeypatch.setattr(exiftool_client, "_default_pool", None)
+    yield wrapper
+    if exiftool_client._default_pool is not None:
+        exiftool_client._default_pool.close()
+
+
+@pytest.fixture
+def organizer(tmp_path):
+    """Return a function building an Organizer importing a source into
+    tmp_path/target
+    """
+    target = tmp_path / "target"
+    target.mkdir()
+    opened = []
+    def build(source, retry_failed=False):
+        index = library_index.LibraryIndex(str(target))
+        journal = source_journal.SourceJournal(str(source), str(target))
+        opened.extend((index, journal))
+        return organize.Organizer(str(target), False, index, journal, run_stats.RunStats(), retry_failed)
+    yield build
+    for resource in opened:
+        resource.close()
@@ -0,0 +1,46 @@
+import io
+import random
+
+from benchmarks import corpus
+from photoorg import organize
+from conftest import DATE_TIME
+
+
+def test_limit_hides_the_rest_of_the_file():
+    reader = organize.BoundedReader(io.BytesIO(b"x" * 100), limit=10)
+    assert reader.read(4) == b"xxxx"
+    assert not reader.truncated
+    assert reader.read() == b"x" * 6
+    assert reader.truncated
+    assert reader.bytes_read == 10
+
+
+def test_metadata_read_stops_at_the_exif(tmp_path, jpeg):
+    filename = str(tmp_path / "a.jpg")
+    jpeg(filename, size=1024 * 1024)
+    exif_proc = organize.ExifProcessor(filename, False)
+    exif_proc.process_exif()
+    assert str(exif_proc.tags["EXIF DateTimeOriginal"]) == DATE_TIME
+    assert str(exif_proc.tags["Image Model"]) == "NIKON Z 6"
+    assert exif_proc.bytes_read < organize.METADATA_READ_LIMIT
+
+
+def test_falls_back_to_the_full_file_past_the_limit(tmp_path, jpeg, monkeypatch):
+    filename = str(tmp_path / "a.jpg")
+    jpeg(filename, size=64 * 1024)
+    # The DateTimeOriginal sits about 100 bytes into the file
+    monkeypatch.setattr(organize, "METADATA_READ_LIMIT", 40)
+    exif_proc = organize.ExifProcessor(filename, False)
+    exif_proc.process_exif()
+    assert str(exif_proc.tags["EXIF DateTimeOriginal"]) == DATE_TIME
+    assert exif_proc.bytes_read > 40
+
+
+def test_falls_back_when_the_limit_cuts_the_date(tmp_path, monkeypatch):
+    filename = tmp_path / "a.NEF"
+    filename.write_bytes(corpus.nef_bytes(random.Random(0), 64 * 1024, "NIKON Z 6", DATE_TIME))
+    # The DateTimeOriginal value starts 66 bytes into the file
+    monkeypatch.setattr(organize, "METADATA_READ_LIMIT", 70)
+    exif_proc = organize.ExifProcessor(str(filename), False)
+    exif_proc.process_exif()
+    assert str(exif_proc.tags["EXIF DateTimeOriginal"]) == DATE_TIME
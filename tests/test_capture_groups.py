@@ -0,0 +1,57 @@
+import os
+
+from photoorg import source_journal
+from conftest import DATE_DIR, PREFIX
+
+
+def test_capture_group_keeps_one_suffix(tmp_path, jpeg, organizer):
+    src = tmp_path / "src"
+    photo = jpeg(str(src / "a.jpg"), seed=1)
+    (src / "a.xmp").write_bytes(b"new sidecar")
+    day = tmp_path / "target" / DATE_DIR
+    # Same photo, different sidecar
+    jpeg(str(day / (PREFIX + "a.jpg")), seed=1)
+    (day / (PREFIX + "a.xmp")).write_bytes(b"old sidecar")
+    org = organizer(src)
+    plan = org.plan(org.pending_files(str(src)))
+    org.execute(plan)
+    assert (day / (PREFIX + "a-1.jpg")).read_bytes() == photo
+    assert (day / (PREFIX + "a-1.xmp")).read_bytes() == b"new sidecar"
+
+
+def test_sidecar_left_by_an_interrupted_run_joins_its_photo(tmp_path, jpeg, organizer):
+    src = tmp_path / "src"
+    jpeg(str(src / "a.jpg"), seed=1)
+    (src / "a.xmp").write_bytes(b"sidecar")
+    org = organizer(src)
+    plan = org.plan(org.pending_files(str(src)))
+    # Stop after the photo
+    org.execute([planned for planned in plan if planned.identity[0] == "a.jpg"])
+    org.journal.commit()
+
+    org = organizer(src)
+    plan = org.plan(org.pending_files(str(src)))
+    org.execute(plan)
+    day = tmp_path / "target" / DATE_DIR
+    assert [planned.outcome for planned in plan] == [source_journal.MOVED]
+    assert (day / (PREFIX + "a.xmp")).read_bytes() == b"sidecar"
+    assert not (src / "a.xmp").exists()
+
+
+def test_sidecar_without_photo_waits_for_it(tmp_path, jpeg, organizer):
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    (src / "sub" / "a.xmp").write_bytes(b"sidecar")
+    org = organizer(src)
+    plan = org.plan(org.pending_files(str(src)))
+    org.execute(plan)
+    org.journal.commit()
+    assert [planned.outcome for planned in plan] == [source_journal.UNPLACED]
+    assert (src / "sub" / "a.xmp").exists()
+
+    jpeg(str(src / "sub" / "a.jpg"), seed=1)
+    org = organizer(src)
+    plan = org.plan(org.pending_files(str(src)))
+    org.execute(plan)
+    day = tmp_path / "target" / DATE_DIR
+    assert sorted(os.listdir(day)) == [PREFIX + "a.jpg", PREFIX + "a.xmp"]
@@ -0,0 +1,40 @@
+import os
+
+from photoorg import dedup, library_index
+
+
+def test_only_files_alike_so_far_are_hashed_further(tmp_path, monkeypatch):
+    large = 3 * dedup.PARTIAL_HASH_BYTES
+    head, middle, tail = b"h" * dedup.PARTIAL_HASH_BYTES, b"m" * dedup.PARTIAL_HASH_BYTES, b"t" * dedup.PARTIAL_HASH_BYTES
+    contents = {
+        "small.jpg": b"small", "sub/small.jpg": b"small", "other-small.jpg": b"SMALL",
+        "lonely.jpg": b"a size of its own",
+        "empty.jpg": b"", "sub/empty.jpg": b"",
+        "large.jpg": head + middle + tail, "sub/large-1.jpg": head + middle + tail,
+        # Same head and tail, only the full hash tells it apart
+        "same-ends.jpg": head + b"M" * len(middle) + tail,
+        # Set apart by the partial hash already
+        "other-head.jpg": b"H" * len(head) + middle + tail,
+    }
+    for name, data in contents.items():
+        os.makedirs(os.path.dirname(tmp_path / name), exist_ok=True)
+        (tmp_path / name).write_bytes(data)
+    hashed = []
+    full_hash = library_index.hash_file
+    def hash_file(filename):
+        hashed.append(os.path.relpath(filename, tmp_path))
+        return full_hash(filename)
+    monkeypatch.setattr(library_index, "hash_file", hash_file)
+
+    by_size = dedup.walk_sizes(str(tmp_path))
+    assert len(by_size[large]) == 4
+    duplicates = sorted((size, sorted(os.path.relpath(filename, tmp_path) for filename in files))
+                        for size, digest, files in dedup.find_duplicates(by_size, 2))
+    assert duplicates == [(5, ["small.jpg", os.path.join("sub", "small.jpg")]),
+                          (large, ["large.jpg", os.path.join("sub", "large-1.jpg")])]
+    assert sorted(hashed) == sorted(["small.jpg", os.path.join("sub", "small.jpg"), "other-small.jpg",
+                                     "large.jpg", os.path.join("sub", "large-1.jpg"), "same-ends.jpg"])
+
+
+def test_original_is_the_name_without_a_suffix():
+    assert dedup.choose_original(["b/x-1.jpg", "a/long/x.jpg", "b/x.jpg"]) == "b/x.jpg"
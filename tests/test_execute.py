@@ -0,0 +1,40 @@
+import os
+import random
+
+from benchmarks import corpus
+from photoorg import source_journal, zip_source
+from conftest import DATE_DIR, PREFIX, make_zip
+
+
+def test_target_taken_after_planning_gets_the_next_suffix(tmp_path, jpeg, organizer):
+    src = tmp_path / "src"
+    photo = jpeg(str(src / "a.jpg"), seed=1)
+    org = organizer(src)
+    plan = org.plan(org.pending_files(str(src)))
+    day = tmp_path / "target" / DATE_DIR
+    jpeg(str(day / (PREFIX + "a.jpg")), seed=2)
+    org.execute(plan)
+    assert plan[0].outcome == source_journal.MOVED
+    assert (day / (PREFIX + "a-1.jpg")).read_bytes() == photo
+
+
+def test_archive_member_read_by_exiftool_is_extracted_once(tmp_path, exiftool, organizer, monkeypatch):
+    src = tmp_path / "src"
+    src.mkdir()
+    clip = corpus.movie_bytes(random.Random(0), 64 * 1024, "2021:03:04 05:06:07")
+    archive = make_zip(src / "photos.zip", {"clip.MOV": clip})
+    def copy_member(*args):
+        raise AssertionError("extracted a second time")
+    monkeypatch.setattr(zip_source, "copy_member", copy_member)
+
+    org = organizer(archive)
+    plan = org.plan(org.pending_files(archive))
+    target = tmp_path / "target"
+    # The copy ExifTool read waits in the library, hidden from the walkers
+    assert [name.startswith(".photo-org-spool-") for name in os.listdir(target) if name.endswith(".MOV")] == [True]
+    org.execute(plan)
+
+    assert plan[0].outcome == source_journal.MOVED
+    # The member's own timestamp is older than the embedded date, so wins
+    assert (target / "2020" / "01" / "02" / "20200102-030406-nikon-z-6_2-clip.MOV").read_bytes() == clip
+    assert not any(name.startswith(".photo-org-spool-") for name in os.listdir(target))
@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from photoorg import exiftool_client
+
+
+@pytest.fixture
+def pool(exiftool):
+    pool = exiftool_client.ExifToolPool(1)
+    yield pool
+    pool.close()
+
+
+def test_requests_share_one_process(tmp_path, pool):
+    photo = tmp_path / "a.mov"
+    photo.write_bytes(b"PHOTOORG-DATE:2021:03:04 05:06:07")
+    assert pool.get_tags(str(photo))["CreateDate"] == "2021:03:04 05:06:07"
+    stdout, stderr = pool.execute("-json", str(tmp_path / "missing.mov"))
+    assert stdout == ""
+    assert stderr.strip() == "Error: File not found - {}".format(tmp_path / "missing.mov")
+    worker, = pool._workers
+    assert worker.seq == 2
+
+
+def test_a_lot_of_stderr_does_not_stall_the_request(tmp_path, pool):
+    # Far more than a pipe holds, ExifTool would block writing it if
+    # nobody read stderr while we wait for stdout
+    missing = [str(tmp_path / "missing-{:05}.jpg".format(i)) for i in range(5000)]
+    stdout, stderr = pool.execute("-json", *missing)
+    assert stderr.splitlines() == ["Error: File not found - " + filename for filename in missing]
+    lines = []
+    stdout, stderr = pool.execute("-json", *missing[:3], on_stderr=lines.append)
+    assert stderr == ""
+    assert lines == ["Error: File not found - {}\n".format(filename) for filename in missing[:3]]
+
+
+def test_dead_worker_is_replaced(tmp_path, pool):
+    pool.execute("-ver")
+    worker, = pool._workers
+    worker.proc.kill()
+    worker.proc.wait()
+    with pytest.raises(OSError):
+        pool.execute("-ver")
+    assert pool._workers == []
+    pool.execute("-ver")
+    assert pool._workers[0] is not worker
+
+
+def test_dropping_a_broken_worker_wakes_a_waiter(pool):
+    worker = pool._acquire()
+    done = threading.Event()
+    waiter = threading.Thread(target=lambda: (pool.execute("-ver"), done.set()))
+    waiter.start()
+    assert not done.wait(0.2)
+    pool._release(worker, broken=True)
+    worker.close()
+    waiter.join(10)
+    assert done.is_set()
+
+
+def test_line_breaks_are_refused(pool):
+    with pytest.raises(ValueError):
+        pool.execute("-json", "a\n-delete_original")
+    assert pool._workers == []
@@ -0,0 +1,66 @@
+import errno
+import hashlib
+import os
+
+import pytest
+
+from photoorg import fast_move
+
+
+@pytest.fixture
+def files(tmp_path):
+    src = tmp_path / "src.jpg"
+    src.write_bytes(b"new photo")
+    dst = tmp_path / "dst.jpg"
+    return src, dst
+
+
+def test_move(files):
+    src, dst = files
+    assert fast_move.move_file(str(src), str(dst), "known") == "known"
+    assert not src.exists()
+    assert dst.read_bytes() == b"new photo"
+
+
+def test_move_never_replaces_the_target(files):
+    src, dst = files
+    dst.write_bytes(b"old photo")
+    with pytest.raises(FileExistsError):
+        fast_move.move_file(str(src), str(dst))
+    assert src.read_bytes() == b"new photo"
+    assert dst.read_bytes() == b"old photo"
+
+
+def test_move_without_hard_links(files, monkeypatch):
+    def link(src, dst):
+        raise OSError(errno.EPERM, "Operation not permitted")
+    monkeypatch.setattr(os, "link", link)
+    src, dst = files
+    dst.write_bytes(b"old photo")
+    with pytest.raises(FileExistsError):
+        fast_move.move_file(str(src), str(dst))
+    assert dst.read_bytes() == b"old photo"
+    os.remove(dst)
+    fast_move.move_file(str(src), str(dst))
+    assert not src.exists()
+    assert dst.read_bytes() == b"new photo"
+
+
+@pytest.mark.parametrize("sha256", [None, hashlib.sha256(b"new photo").hexdigest()])
+def test_move_across_devices(files, monkeypatch, sha256):
+    monkeypatch.setattr(fast_move, "same_device", lambda src, dst: False)
+    src, dst = files
+    assert fast_move.move_file(str(src), str(dst), sha256) == hashlib.sha256(b"new photo").hexdigest()
+    assert not src.exists()
+    assert dst.read_bytes() == b"new photo"
+
+
+@pytest.mark.parametrize("sha256", [None, "known"])
+def test_move_across_devices_never_replaces_the_target(files, monkeypatch, sha256):
+    monkeypatch.setattr(fast_move, "same_device", lambda src, dst: False)
+    src, dst = files
+    dst.write_bytes(b"old photo")
+    with pytest.raises(FileExistsError):
+        fast_move.move_file(str(src), str(dst), sha256)
+    assert src.read_bytes() == b"new photo"
+    assert dst.read_bytes() == b"old photo"
@@ -0,0 +1,56 @@
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from photoorg import perceptual_hash
+
+
+def test_bk_tree_search_finds_what_a_scan_would_and_looks_at_less(monkeypatch):
+    rng = random.Random(0)
+    values = [rng.getrandbits(64) for i in range(2000)]
+    # Some close relatives so there is something to find
+    values += [value ^ (1 << rng.randrange(64)) for value in values[:200]]
+    tree = perceptual_hash.BKTree()
+    for item, value in enumerate(values):
+        tree.add(value, item)
+    assert tree.size == len(values)
+    compared = []
+    hamming = perceptual_hash.hamming
+    def counting_hamming(a, b):
+        compared.append(b)
+        return hamming(a, b)
+    monkeypatch.setattr(perceptual_hash, "hamming", counting_hamming)
+    for query in values[:50]:
+        for max_distance in (0, 4, 10):
+            del compared[:]
+            found = sorted(tree.search(query, max_distance))
+            assert found == sorted((hamming(query, value), item) for item, value in enumerate(values)
+                                   if hamming(query, value) <= max_distance)
+            assert len(compared) < len(values)
+
+
+def test_find_similar_chains_lookalikes_but_not_raw_and_jpeg(tmp_path):
+    base = 0x0123456789abcdef
+    hashes = {
+        "a.jpg": base,
+        "b.jpg": base ^ 0b111,
+        # 6 bits from a.jpg, but 3 from b.jpg
+        "c.jpg": base ^ 0b111000,
+        "far.jpg": ~base & (2 ** 64 - 1),
+        "shot.jpg": 0xf0f0f0f0f0f0f0f0,
+        "shot.nef": 0xf0f0f0f0f0f0f0f0,
+        "broken.jpg": None,
+    }
+    cache = perceptual_hash.HashCache(str(tmp_path))
+    filenames = []
+    for name, value in hashes.items():
+        filename = str(tmp_path / name)
+        with open(filename, "wb") as f:
+            f.write(name.encode())
+        cache.store(filename, os.stat(filename), value)
+        filenames.append(filename)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        groups = perceptual_hash.find_similar(filenames, cache, executor, max_distance=4)
+    cache.close()
+    assert [sorted((os.path.basename(filename), value) for filename, value in group) for group in groups] == [
+        [("a.jpg", hashes["a.jpg"]), ("b.jpg", hashes["b.jpg"]), ("c.jpg", hashes["c.jpg"])]]
@@ -0,0 +1,43 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from photoorg import source_journal
+from conftest import make_zip
+
+
+def write_source(tmp_path, jpeg, kind):
+    photos = {}
+    for seed in range(120):
+        # Names repeat across the directories and collide in the library,
+        # the last photos come in identical pairs
+        name = "dir{}/img{}.jpg".format(seed % 6, seed // 6)
+        photos[name] = jpeg(str(tmp_path / "src" / name), seed=seed - seed % 2 if seed >= 90 else seed, size=8 * 1024)
+    if kind == "directory":
+        return str(tmp_path / "src")
+    archive = make_zip(tmp_path / "photos.zip", photos)
+    return archive
+
+
+@pytest.mark.parametrize("kind", ["directory", "archive"])
+def test_jobs_plan_like_a_single_process(tmp_path, jpeg, organizer, kind):
+    source = write_source(tmp_path, jpeg, kind)
+
+    def plan(executor=None, jobs=1):
+        org = organizer(source)
+        return org, org.plan(org.pending_files(source), executor, jobs)
+
+    sequential = [(planned.identity[0], planned.outcome, planned.target) for planned in plan()[1]]
+    with ProcessPoolExecutor(max_workers=3) as executor:
+        org, parallel = plan(executor, 3)
+    assert [(planned.identity[0], planned.outcome, planned.target) for planned in parallel] == sequential
+    outcomes = [outcome for key, outcome, target in sequential]
+    assert source_journal.FAILED not in outcomes
+    assert source_journal.TRASHED in outcomes
+
+    org.execute(parallel)
+    moved = sorted(target for key, outcome, target in sequential if outcome == source_journal.MOVED)
+    assert sorted(os.path.join(root, name)
+                  for root, dirs, names in os.walk(tmp_path / "target")
+                  for name in names if not name.startswith(".")) == moved
@@ -0,0 +1,40 @@
+import os
+
+from photoorg import source_journal
+from conftest import DATE_DIR, PREFIX
+
+
+def test_colliding_names_get_suffixes_in_walk_order(tmp_path, jpeg, organizer):
+    src = tmp_path / "src"
+    photos = {name: jpeg(str(src / name), seed=seed)
+              for seed, name in enumerate(("a.jpg", "sub/a.jpg", "sub/deeper/a.jpg"))}
+    org = organizer(src)
+    plan = org.plan(org.pending_files(str(src)))
+    org.execute(plan)
+    day = tmp_path / "target" / DATE_DIR
+    for name, suffix in (("a.jpg", ""), ("sub/a.jpg", "-1"), ("sub/deeper/a.jpg", "-2")):
+        assert (day / (PREFIX + "a" + suffix + ".jpg")).read_bytes() == photos[name]
+    assert len(os.listdir(day)) == 3
+
+
+def test_names_already_in_the_library_are_skipped(tmp_path, jpeg, organizer):
+    src = tmp_path / "src"
+    day = tmp_path / "target" / DATE_DIR
+    jpeg(str(day / (PREFIX + "a.jpg")), seed=1)
+    jpeg(str(day / (PREFIX + "a-1.jpg")), seed=2)
+    photo = jpeg(str(src / "a.jpg"), seed=3)
+    org = organizer(src)
+    plan = org.plan(org.pending_files(str(src)))
+    org.execute(plan)
+    assert plan[0].target == str(day / (PREFIX + "a-2.jpg"))
+    assert (day / (PREFIX + "a-2.jpg")).read_bytes() == photo
+
+
+def test_identical_file_is_not_imported_twice(tmp_path, jpeg, organizer):
+    src = tmp_path / "src"
+    jpeg(str(src / "a.jpg"), seed=1)
+    jpeg(str(src / "sub/a.jpg"), seed=1)
+    org = organizer(src)
+    plan = org.plan(org.pending_files(str(src)))
+    assert [planned.outcome for planned in plan] == [source_journal.MOVED, source_journal.TRASHED]
+    assert plan[0].target == plan[1].target
@@ -0,0 +1,57 @@
+import os
+
+from photoorg import read_ahead
+
+DATA = bytes(range(256)) * 40
+
+
+def prefetched(tmp_path, head_size):
+    filename = tmp_path / "a.nef"
+    filename.write_bytes(DATA)
+    head, size = read_ahead.read_head(str(filename), head_size)
+    return read_ahead.PrefetchedFile(str(filename), head, size)
+
+
+def test_reads_within_the_head_leave_the_file_alone(tmp_path):
+    f = prefetched(tmp_path, 1024)
+    assert f.read(10) == DATA[:10]
+    f.seek(1000)
+    assert f.read(24) == DATA[1000:1024]
+    assert f.f is None
+
+
+def test_reads_past_the_head_go_to_the_file(tmp_path):
+    f = prefetched(tmp_path, 1024)
+    f.seek(1000)
+    # Across the end of the head
+    assert f.read(100) == DATA[1000:1100]
+    assert f.tell() == 1100
+    f.seek(-10, os.SEEK_END)
+    assert f.read() == DATA[-10:]
+    assert f.read(10) == b""
+    f.seek(-5, os.SEEK_CUR)
+    assert f.read(100) == DATA[-5:]
+    f.seek(0)
+    assert f.read() == DATA
+    f.close()
+    assert f.closed and f.f.closed
+
+
+def test_whole_file_in_the_head(tmp_path):
+    f = prefetched(tmp_path, len(DATA) * 2)
+    f.seek(len(DATA) - 3)
+    assert f.read(100) == DATA[-3:]
+    assert f.f is None
+
+
+def test_prefetcher_keeps_the_order_and_its_bounds(tmp_path):
+    for i in range(20):
+        (tmp_path / "{}.jpg".format(i)).write_bytes(DATA)
+    # Nothing to read for 7, 20 is gone
+    def filename_of(i):
+        return str(tmp_path / "{}.jpg".format(i)) if i != 7 else None
+    prefetcher = read_ahead.Prefetcher(100, max_files=3, max_bytes=250)
+    result = list(prefetcher.iterate(range(21), filename_of))
+    assert [item for item, head in result] == list(range(21))
+    assert result[7][1] is None and result[20][1] is None
+    assert all(head == (filename_of(i), DATA[:100], len(DATA)) for i, head in result if i not in (7, 20))
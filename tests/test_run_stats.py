@@ -0,0 +1,24 @@
+import pytest
+
+from photoorg import run_stats
+
+
+def durations(*seconds):
+    result = run_stats.Durations()
+    for value in seconds:
+        result.add(value)
+    return result
+
+
+def test_percentile_is_the_nearest_rank():
+    two = durations(0.001, 0.1)
+    assert two.percentile(50) == pytest.approx(0.001, rel=run_stats.BUCKET_RATIO - 1)
+    assert two.percentile(51) == pytest.approx(0.1, rel=run_stats.BUCKET_RATIO - 1)
+    hundred = durations(*(i / 1000.0 for i in range(1, 101)))
+    assert hundred.percentile(95) == pytest.approx(0.095, rel=run_stats.BUCKET_RATIO - 1)
+    assert hundred.percentile(100) == pytest.approx(0.1)
+    assert hundred.percentile(0) == pytest.approx(0.001)
+
+
+def test_percentile_of_nothing():
+    assert run_stats.Durations().percentile(50) == 0.0
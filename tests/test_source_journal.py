@@ -0,0 +1,86 @@
+import os
+
+from photoorg import source_journal
+from photoorg.source_journal import SourceJournal
+from conftest import make_zip
+
+
+def test_outcomes_survive_a_restart(tmp_path):
+    photo = tmp_path / "a.jpg"
+    photo.write_bytes(b"photo")
+    journal = SourceJournal(str(tmp_path))
+    identity = journal.identify(str(photo))
+    assert not journal.should_skip(identity)
+    journal.record(identity, source_journal.UNSUPPORTED)
+    journal.close()
+
+    journal = SourceJournal(str(tmp_path))
+    assert journal.should_skip(journal.identify(str(photo)))
+    journal.close()
+
+
+def test_changed_file_is_looked_at_again(tmp_path):
+    photo = tmp_path / "a.jpg"
+    photo.write_bytes(b"photo")
+    journal = SourceJournal(str(tmp_path))
+    journal.record(journal.identify(str(photo)), source_journal.UNSUPPORTED)
+    photo.write_bytes(b"another photo")
+    assert not journal.should_skip(journal.identify(str(photo)))
+    journal.close()
+
+
+def test_failed_files_are_only_retried_when_asked(tmp_path):
+    photo = tmp_path / "a.jpg"
+    photo.write_bytes(b"photo")
+    journal = SourceJournal(str(tmp_path))
+    identity = journal.identify(str(photo))
+    journal.record(identity, source_journal.FAILED, detail="boom")
+    assert journal.should_skip(identity)
+    assert not journal.should_skip(identity, retry_failed=True)
+    journal.close()
+
+
+def test_interrupted_import_resumes(tmp_path, jpeg, organizer):
+    src = tmp_path / "src"
+    members = {"a.jpg": jpeg(str(src / "a.jpg"), seed=1), "b.jpg": jpeg(str(src / "b.jpg"), seed=2)}
+    for name in members:
+        os.remove(src / name)
+    archive = make_zip(src / "photos.zip", members)
+
+    org = organizer(archive)
+    plan = org.plan(org.pending_files(archive))
+    # Stop after the first file
+    org.execute(plan[:1])
+    org.journal.commit()
+
+    org = organizer(archive)
+    plan = org.plan(org.pending_files(archive))
+    assert [planned.identity[0] for planned in plan] == ["photos.zip:b.jpg"]
+    assert org.stats.counters["skipped (journal)"] == 1
+    org.execute(plan)
+    assert plan[0].outcome == source_journal.MOVED
+    assert not plan[0].target.endswith("-1.jpg")
+
+
+def test_read_only_source_keeps_its_journal_in_the_library(tmp_path, jpeg, organizer, monkeypatch):
+    src = tmp_path / "card"
+    src.mkdir()
+    photo = jpeg(str(tmp_path / "a.jpg"), seed=1)
+    os.remove(tmp_path / "a.jpg")
+    archive = make_zip(src / "photos.zip", {"a.jpg": photo})
+    # Running as root, nothing is ever read-only
+    access = os.access
+    monkeypatch.setattr(os, "access", lambda filename, mode: filename != str(src) and access(filename, mode))
+
+    org = organizer(archive)
+    org.execute(org.plan(org.pending_files(archive)))
+    org.journal.commit()
+    assert sorted(os.listdir(src)) == ["photos.zip"]
+    journals = tmp_path / "target" / source_journal.FALLBACK_DIRNAME
+    assert [name.startswith("card-") for name in os.listdir(journals)] == [True]
+    assert source_journal.fallback_filename(str(tmp_path / "target"), str(tmp_path / "other" / "card")) != \
+        org.journal.filename
+
+    org = organizer(archive)
+    assert org.plan(org.pending_files(archive)) == []
+    assert org.stats.counters["skipped (journal)"] == 1
@@ -0,0 +1,60 @@
+import json
+import os
+
+from photoorg import unzip
+from conftest import make_zip
+
+MEMBERS = {"a.jpg": b"first photo", "sub/b.jpg": b"second photo", "sub/c.jpg": b"third photo"}
+
+
+def extract(archive, members=None):
+    job = unzip.ArchiveJob(archive)
+    for info in job.members:
+        if members is None or info.filename in members:
+            job.extract_member(info)
+    job.close()
+    return job
+
+
+def test_interrupted_extraction_resumes(tmp_path):
+    archive = make_zip(tmp_path / "files.zip", MEMBERS)
+    assert extract(archive, ["a.jpg"]).members_extracted == 1
+    with open(tmp_path / "files.manifest.jsonl") as f:
+        assert [json.loads(line)["name"] for line in f] == ["a.jpg"]
+    job = extract(archive)
+    assert job.members_extracted == 2
+    for name, data in MEMBERS.items():
+        assert (tmp_path / "files" / name).read_bytes() == data
+    assert extract(archive).members_extracted == 0
+
+
+def test_files_missing_from_the_manifest_are_checked_against_the_crc(tmp_path):
+    archive = make_zip(tmp_path / "files.zip", MEMBERS)
+    (tmp_path / "files" / "sub").mkdir(parents=True)
+    # From before the manifest existed: one intact, one of the right size
+    # but corrupted
+    (tmp_path / "files" / "a.jpg").write_bytes(b"first photo")
+    (tmp_path / "files" / "sub" / "b.jpg").write_bytes(b"second PHOTO")
+    job = extract(archive)
+    assert job.members_extracted == 2
+    assert (tmp_path / "files" / "sub" / "b.jpg").read_bytes() == b"second photo"
+    with open(tmp_path / "files.manifest.jsonl") as f:
+        assert sorted(json.loads(line)["name"] for line in f) == sorted(MEMBERS)
+
+
+def test_member_names_cannot_leave_the_target(tmp_path):
+    archive = make_zip(tmp_path / "files.zip", {"../../evil.jpg": b"x", "/abs/b.jpg": b"y", "./": b""})
+    extract(archive)
+    assert sorted(os.listdir(tmp_path)) == ["files", "files.manifest.jsonl", "files.zip"]
+    assert (tmp_path / "files" / "evil.jpg").read_bytes() == b"x"
+    assert (tmp_path / "files" / "abs" / "b.jpg").read_bytes() == b"y"
+
+
+def test_archives_extracted_with_jobs(tmp_path, capsys):
+    for name in ("one", "two"):
+        make_zip(tmp_path / (name + ".zip"), MEMBERS)
+    unzip.main(["unzip", str(tmp_path), "--jobs", "4"])
+    for name in ("one", "two"):
+        for member, data in MEMBERS.items():
+            assert (tmp_path / name / member).read_bytes() == data
+    assert "Extracted {} bytes from 2 archives".format(2 * sum(map(len, MEMBERS.values()))) in capsys.readouterr().out
@@ -0,0 +1,15 @@
+import os
+
+from photoorg import walker
+
+
+def test_walker_takes_a_directorys_files_before_its_subdirectories(tmp_path):
+    for name in ("b/x.jpg", "a.jpg", "b/c/y.jpg", "z.jpg", "b/w.jpg"):
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_bytes(b"")
+    (tmp_path / ".hidden.jpg").write_bytes(b"")
+    (tmp_path / "notes.txt").write_bytes(b"")
+    files = [os.path.relpath(filename, tmp_path) for filename in walker.Walker((".jpg",)).files(str(tmp_path))]
+    assert sorted(files[:2]) == ["a.jpg", "z.jpg"]
+    assert sorted(files[2:4]) == [os.path.join("b", "w.jpg"), os.path.join("b", "x.jpg")]
+    assert files[4:] == [os.path.join("b", "c", "y.jpg")]
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import time
+import zipfile
+
+import pytest
+
+from photoorg import source_journal, zip_source
+from conftest import DATE_DIR, PREFIX, make_zip
+
+
+def test_list_members_skips_directories(tmp_path):
+    archive = make_zip(tmp_path / "a.zip", {"dir/": b"", "dir/a.jpg": b"a", "b.jpg": b"b"})
+    assert sorted(zip_source.list_members(archive)) == ["b.jpg", "dir/a.jpg"]
+
+
+def test_copy_member(tmp_path):
+    archive = make_zip(tmp_path / "a.zip", {"a.jpg": b"photo"})
+    target = str(tmp_path / "a.jpg")
+    assert zip_source.copy_member(archive, "a.jpg", target) == hashlib.sha256(b"photo").hexdigest()
+    with open(target, "rb") as f:
+        assert f.read() == b"photo"
+    assert os.path.getmtime(target) == time.mktime((2020, 1, 2, 3, 4, 6, 0, 0, -1))
+    # Same mode as any file the user creates, not mkstemp's 0600
+    umask = os.umask(0)
+    os.umask(umask)
+    assert os.stat(target).st_mode & 0o777 == 0o666 & ~umask
+    # No temporary file is left next to it
+    assert sorted(os.listdir(tmp_path)) == ["a.jpg", "a.zip"]
+
+
+def test_copy_member_never_replaces_the_target(tmp_path):
+    archive = make_zip(tmp_path / "a.zip", {"a.jpg": b"photo"})
+    target = tmp_path / "out" / "a.jpg"
+    target.parent.mkdir()
+    target.write_bytes(b"already there")
+    with pytest.raises(FileExistsError):
+        zip_source.copy_member(archive, "a.jpg", str(target))
+    assert os.listdir(target.parent) == ["a.jpg"]
+    assert target.read_bytes() == b"already there"
+
+
+def test_failed_copy_leaves_nothing_behind(tmp_path):
+    filename = tmp_path / "a.zip"
+    with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("a.jpg", os.urandom(256 * 1024))
+    data = bytearray(filename.read_bytes())
+    data[100 * 1024:100 * 1024 + 64] = b"\1" * 64
+    filename.write_bytes(bytes(data))
+    out = tmp_path / "out"
+    out.mkdir()
+    with pytest.raises(Exception):
+        zip_source.copy_member(str(filename), "a.jpg", str(out / "a.jpg"))
+    assert os.listdir(out) == []
+
+
+def test_import_from_archive(tmp_path, jpeg, organizer):
+    src = tmp_path / "src"
+    first = jpeg(str(src / "a.jpg"), seed=1)
+    second = jpeg(str(src / "b.jpg"), seed=2)
+    archive = make_zip(src / "photos.zip", {"a.jpg": first, "sub/b.jpg": second, "copy/a.jpg": first})
+    for name in ("a.jpg", "b.jpg"):
+        os.remove(src / name)
+
+    org = organizer(str(archive))
+    plan = org.plan(org.pending_files(archive))
+    org.execute(plan)
+
+    outcomes = sorted((planned.identity[0], planned.outcome) for planned in plan)
+    assert outcomes == [("photos.zip:a.jpg", source_journal.MOVED),
+                        ("photos.zip:copy/a.jpg", source_journal.TRASHED),
+                        ("photos.zip:sub/b.jpg", source_journal.MOVED)]
+    day = tmp_path / "target" / DATE_DIR
+    assert sorted(os.listdir(day)) == [PREFIX + "a.jpg", PREFIX + "b.jpg"]
+    assert (day / (PREFIX + "a.jpg")).read_bytes() == first
+    assert (day / (PREFIX + "b.jpg")).read_bytes() == second
+    # The archive itself is left alone
+    assert sorted(zip_source.list_members(archive)) == ["a.jpg", "copy/a.jpg", "sub/b.jpg"]
+
+
+def test_import_from_archive_with_jobs(tmp_path, jpeg, organizer):
+    from concurrent.futures import ProcessPoolExecutor
+    members = {}
+    for seed in range(300):
+        members[f"dir{seed % 7}/img{seed % 40}.jpg"] = jpeg(str(tmp_path / "tmp.jpg"), seed=seed, size=16 * 1024)
+    os.remove(tmp_path / "tmp.jpg")
+    (tmp_path / "src").mkdir()
+    archive = make_zip(tmp_path / "src" / "photos.zip", members)
+
+    org = organizer(archive)
+    sequential = [(planned.identity[0], planned.outcome, planned.target)
+                  for planned in org.plan(org.pending_files(archive))]
+    org = organizer(archive)
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        parallel = [(planned.identity[0], planned.outcome, planned.target)
+                    for planned in org.plan(org.pending_files(archive), executor, 4)]
+    assert parallel == sequential
+    assert not any(outcome == source_journal.FAILED for key, outcome, target in parallel)